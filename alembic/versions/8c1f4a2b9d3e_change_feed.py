@@ -0,0 +1,91 @@
+"""Change feed: updated_at indexes and deletion tombstones
+
+Revision ID: 8c1f4a2b9d3e
+Revises: 5e21e7e687a7
+Create Date: 2026-10-18 10:12:04.118203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c1f4a2b9d3e"
+down_revision: Union[str, None] = "5e21e7e687a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = {
+    "buildings": "building",
+    "activities": "activity",
+    "organizations": "organization",
+}
+
+
+def upgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"UPDATE {table} SET updated_at = COALESCE(created_at, now()) "
+            "WHERE updated_at IS NULL"
+        )
+        op.alter_column(table, "updated_at", server_default=sa.text("now()"))
+        op.create_index(
+            op.f(f"ix_{table}_updated_at"), table, ["updated_at"], unique=False
+        )
+
+    op.create_table(
+        "deleted_entities",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity_type", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_deleted_entities_id"), "deleted_entities", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_deleted_entities_deleted_at"),
+        "deleted_entities",
+        ["deleted_at"],
+        unique=False,
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_deleted_entity() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO deleted_entities (entity_type, entity_id)
+            VALUES (TG_ARGV[0], OLD.id);
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, entity_type in TRACKED_TABLES.items():
+        op.execute(
+            f"CREATE TRIGGER {table}_record_deleted AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION record_deleted_entity('{entity_type}')"
+        )
+
+
+def downgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_record_deleted ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS record_deleted_entity()")
+
+    op.drop_index(op.f("ix_deleted_entities_deleted_at"), table_name="deleted_entities")
+    op.drop_index(op.f("ix_deleted_entities_id"), table_name="deleted_entities")
+    op.drop_table("deleted_entities")
+
+    for table in TRACKED_TABLES:
+        op.drop_index(op.f(f"ix_{table}_updated_at"), table_name=table)
+        op.alter_column(table, "updated_at", server_default=None)
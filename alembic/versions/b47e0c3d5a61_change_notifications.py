@@ -0,0 +1,61 @@
+"""Change notifications via LISTEN/NOTIFY
+
+Revision ID: b47e0c3d5a61
+Revises: 8c1f4a2b9d3e
+Create Date: 2026-10-18 11:40:27.502914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b47e0c3d5a61"
+down_revision: Union[str, None] = "8c1f4a2b9d3e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = {
+    "buildings": "building",
+    "activities": "activity",
+    "organizations": "organization",
+}
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_directory_change() RETURNS trigger AS $$
+        DECLARE
+            row_id integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                row_id := OLD.id;
+            ELSE
+                row_id := NEW.id;
+            END IF;
+            PERFORM pg_notify(
+                'directory_changes',
+                json_build_object(
+                    'entity', TG_ARGV[0], 'id', row_id, 'op', lower(TG_OP)
+                )::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, entity_type in TRACKED_TABLES.items():
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_change "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION notify_directory_change('{entity_type}')"
+        )
+
+
+def downgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_directory_change()")
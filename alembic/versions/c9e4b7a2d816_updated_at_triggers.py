@@ -0,0 +1,46 @@
+"""Change feed: set updated_at in the database on every update
+
+Revision ID: c9e4b7a2d816
+Revises: f7c2a9e41b85
+Create Date: 2026-10-18 18:05:41.226013
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e4b7a2d816"
+down_revision: Union[str, None] = "f7c2a9e41b85"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = ("buildings", "activities", "organizations")
+
+
+def upgrade() -> None:
+    # ORM-овский onupdate срабатывает только для UPDATE через модели;
+    # триггер обновляет метку и при массовых UPDATE и правках вручную.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_set_updated_at BEFORE UPDATE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+        )
+
+
+def downgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_set_updated_at ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
@@ -0,0 +1,59 @@
+"""Directory version: commit-ordered change counter for export ETags
+
+Revision ID: d6f1a8c3e527
+Revises: c9e4b7a2d816
+Create Date: 2026-10-18 18:42:13.904517
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d6f1a8c3e527"
+down_revision: Union[str, None] = "c9e4b7a2d816"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = ("buildings", "activities", "organizations", "organization_activities")
+# Счётчик разбит на ячейки по pg_backend_pid(), чтобы параллельные записи
+# не ждали друг друга на блокировке одной строки до коммита.
+SLOTS = 16
+
+
+def upgrade() -> None:
+    op.create_table(
+        "directory_version",
+        sa.Column("slot", sa.SmallInteger(), nullable=False),
+        sa.Column("changes", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("slot"),
+    )
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION bump_directory_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO directory_version (slot, changes)
+            VALUES (pg_backend_pid() % {SLOTS}, 1)
+            ON CONFLICT (slot)
+            DO UPDATE SET changes = directory_version.changes + 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_bump_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_directory_version()"
+        )
+
+
+def downgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_directory_version()")
+    op.drop_table("directory_version")
@@ -0,0 +1,60 @@
+"""Change feed: bump organizations.updated_at when activity links change
+
+Revision ID: e8b2d4f6a913
+Revises: d6f1a8c3e527
+Create Date: 2026-10-18 20:14:52.371160
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b2d4f6a913"
+down_revision: Union[str, None] = "d6f1a8c3e527"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Событие -> имя таблицы переходов в триггере уровня оператора.
+LINK_EVENTS = {
+    "INSERT": "NEW TABLE AS changed_links",
+    "UPDATE": "NEW TABLE AS changed_links",
+    "DELETE": "OLD TABLE AS changed_links",
+}
+
+
+def upgrade() -> None:
+    # Организация в ленте несёт activity_ids, поэтому изменение одних связей
+    # должно обновить её updated_at; UPDATE организации заодно шлёт NOTIFY.
+    # Организации, уже записанные в этой транзакции (например, только что
+    # созданные), повторно не обновляются.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION touch_linked_organizations() RETURNS trigger AS $$
+        BEGIN
+            UPDATE organizations SET updated_at = now()
+            WHERE id IN (SELECT organization_id FROM changed_links)
+              AND updated_at IS DISTINCT FROM now();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for event, transition in LINK_EVENTS.items():
+        op.execute(
+            f"CREATE TRIGGER organization_activities_touch_{event.lower()} "
+            f"AFTER {event} ON organization_activities "
+            f"REFERENCING {transition} FOR EACH STATEMENT "
+            "EXECUTE FUNCTION touch_linked_organizations()"
+        )
+
+
+def downgrade() -> None:
+    for event in LINK_EVENTS:
+        op.execute(
+            f"DROP TRIGGER IF EXISTS organization_activities_touch_{event.lower()} "
+            "ON organization_activities"
+        )
+    op.execute("DROP FUNCTION IF EXISTS touch_linked_organizations()")
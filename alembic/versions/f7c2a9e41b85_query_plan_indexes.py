@@ -0,0 +1,88 @@
+"""Indexes for foreign keys, change feed keyset and substring search
+
+Revision ID: f7c2a9e41b85
+Revises: e5b3c8d14f27
+Create Date: 2026-10-18 16:37:20.518394
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c2a9e41b85"
+down_revision: Union[str, None] = "e5b3c8d14f27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Лента изменений сортирует по (updated_at, id): составной индекс отдаёт страницу
+# без сортировки, даже если у всех строк одинаковый updated_at (массовый импорт).
+KEYSET_INDEXES = {
+    "buildings": "updated_at",
+    "activities": "updated_at",
+    "organizations": "updated_at",
+    "deleted_entities": "deleted_at",
+}
+
+# Триграммные индексы для `ilike '%...%'` по названию организации и адресу.
+# Создаются, только если в сервере доступно расширение pg_trgm (contrib).
+TRGM_INDEXES = {
+    "ix_organizations_name_trgm": ("organizations", "name"),
+    "ix_buildings_address_trgm": ("buildings", "address"),
+}
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_organizations_building_id"),
+        "organizations",
+        ["building_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_organization_activities_activity_id",
+        "organization_activities",
+        ["activity_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_activities_parent_id"), "activities", ["parent_id"], unique=False
+    )
+
+    for table, column in KEYSET_INDEXES.items():
+        op.create_index(
+            op.f(f"ix_{table}_{column}_id"), table, [column, "id"], unique=False
+        )
+        op.drop_index(op.f(f"ix_{table}_{column}"), table_name=table)
+
+    has_trgm = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'"
+            )
+        )
+        .scalar()
+    )
+    if has_trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for index_name, (table, column) in TRGM_INDEXES.items():
+            op.execute(
+                f"CREATE INDEX {index_name} ON {table} USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    for index_name in TRGM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    for table, column in KEYSET_INDEXES.items():
+        op.create_index(op.f(f"ix_{table}_{column}"), table, [column], unique=False)
+        op.drop_index(op.f(f"ix_{table}_{column}_id"), table_name=table)
+    op.drop_index(op.f("ix_activities_parent_id"), table_name="activities")
+    op.drop_index(
+        "ix_organization_activities_activity_id", table_name="organization_activities"
+    )
+    op.drop_index(op.f("ix_organizations_building_id"), table_name="organizations")
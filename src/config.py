@@ -17,9 +17,32 @@ class Settings(BaseSettings):
         f"{os.getenv('POSTGRES_DB', 'organization_db')}",
     )
     API_KEY: str = os.getenv("API_KEY", "default-api-key")
+    API_KEY_REFRESH_SECONDS: float = float(os.getenv("API_KEY_REFRESH_SECONDS", 60))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "super-secret-key")
     APP_NAME: str = os.getenv("APP_NAME", "Organization Directory API")
     DEBUG: bool = bool(int(os.getenv("DEBUG", 0)))
+    HOST: str = os.getenv("HOST", "0.0.0.0")
+    PORT: int = int(os.getenv("PORT", 8000))
+    WORKERS: int = int(os.getenv("WORKERS", 1))
+    SINGLE_FLIGHT_WAIT_SECONDS: float = float(
+        os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", 5)
+    )
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+    DIRECTORY_CACHE_MAX_AGE_SECONDS: float = float(
+        os.getenv("DIRECTORY_CACHE_MAX_AGE_SECONDS", 300)
+    )
+    RESPONSE_CACHE_TTL_SECONDS: float = float(
+        os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30)
+    )
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", 2))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+    JOB_BACKOFF_SECONDS: float = float(os.getenv("JOB_BACKOFF_SECONDS", 2))
+    JOB_MAX_BACKOFF_SECONDS: float = float(os.getenv("JOB_MAX_BACKOFF_SECONDS", 300))
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", 5))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", 300))
+    SNAPSHOT_PATH: str = os.getenv("SNAPSHOT_PATH", "")
+    SNAPSHOT_MMAP_SIZE: int = int(os.getenv("SNAPSHOT_MMAP_SIZE", 1 << 30))
 
     class Config:
         env_file = ".env"
@@ -1,18 +1,99 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+import json
+import math
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    any_,
+    bindparam,
+    event,
+    func,
+    literal_column,
+    select,
+)
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
+from sqlalchemy.orm import declarative_base
 from src.config import settings
 
 Base = declarative_base()
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
 
-async_session_factory = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+def unicode_lower(value):
+    return value.lower() if value is not None else None
+
+
+def sql_floor(value):
+    return math.floor(value) if value is not None else None
+
+
+def configure_snapshot_connection(dbapi_connection, connection_record):
+    """
+    Снимок открывается только на чтение и отображается в память (mmap),
+    поэтому страницы файла разделяются между всеми процессами через page cache.
+    Встроенный `lower` SQLite понимает только ASCII, поэтому для `ilike`
+    по кириллице он заменяется на Unicode-версию; `floor` (кластеризация зданий)
+    есть не во всех сборках SQLite и регистрируется явно.
+    """
+    dbapi_connection.create_function("lower", 1, unicode_lower, deterministic=True)
+    dbapi_connection.create_function("floor", 1, sql_floor, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA mmap_size={settings.SNAPSHOT_MMAP_SIZE}")
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def build_engine():
+    if settings.SNAPSHOT_PATH:
+        snapshot_engine = create_async_engine(
+            f"sqlite+aiosqlite:///file:{settings.SNAPSHOT_PATH}?mode=ro&uri=true",
+            echo=settings.DEBUG,
+        )
+        event.listen(
+            snapshot_engine.sync_engine, "connect", configure_snapshot_connection
+        )
+        return snapshot_engine
+    return create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+
+
+_engine: Optional[AsyncEngine] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Движок создаётся при первом обращении, а не при импорте: приложение создаёт его
+    в lifespan, а CLI-утилиты и Alembic, которым он не нужен, не платят за импорт
+    драйвера БД.
+    """
+    global _engine
+    if _engine is None:
+        _engine = build_engine()
+    return _engine
+
+
+async def dispose_engine() -> None:
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+
+
+def async_session_factory() -> AsyncSession:
+    return AsyncSession(bind=get_engine(), expire_on_commit=False)
 
 
 async def get_db():
     async with async_session_factory() as session:
         yield session
+
+
+def ids_filter(column, ids: list[int]):
+    """
+    Условие `column = ANY(:ids)` с одним параметром-массивом для Postgres;
+    для снимка SQLite, где массивов нет, — `IN` по `json_each` от JSON-строки.
+    Число параметров не зависит от длины списка.
+    """
+    if get_engine().dialect.name == "postgresql":
+        return column == any_(bindparam("ids", ids, type_=ARRAY(Integer), unique=True))
+    return column.in_(
+        select(literal_column("value")).select_from(func.json_each(json.dumps(ids)))
+    )
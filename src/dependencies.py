@@ -1,17 +1,66 @@
-from fastapi import HTTPException, Security
+from fastapi import HTTPException, Query, Security
 from fastapi.security.api_key import APIKeyHeader
-from starlette.status import HTTP_403_FORBIDDEN
+from math import ceil
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 from src.config import settings
+from src.utils.api_keys import api_key_registry
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+MAX_BATCH_IDS = 1000
+
 
 async def verify_api_key(api_key: str = Security(api_key_header)):
     """
-    Проверка статического API-ключа.
+    Проверка API-ключа по реестру в памяти и квоты ключа (token bucket).
+    Выполняется до открытия сессии БД и не обращается к ней.
     """
-    if api_key != settings.API_KEY:
+    entry = api_key_registry.authenticate(api_key) if api_key else None
+    if entry is None:
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN, detail="Invalid or missing API Key"
         )
+    if entry.bucket is not None:
+        retry_after = entry.bucket.consume()
+        if retry_after:
+            raise HTTPException(
+                status_code=HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(ceil(retry_after))},
+            )
     return api_key
+
+
+async def require_primary_database():
+    """
+    Запрещает запись и Postgres-специфичные операции в режиме офлайн-снимка.
+    """
+    if settings.SNAPSHOT_PATH:
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Not available in read-only snapshot mode",
+        )
+
+
+async def batch_ids(ids: str = Query(..., description="Идентификаторы через запятую")):
+    """
+    Разбирает `?ids=1,2,3` в список без повторов с сохранением порядка.
+    """
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="'ids' must be a comma-separated list of integers",
+        )
+    if not parsed or len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"'ids' must contain from 1 to {MAX_BATCH_IDS} values",
+        )
+    return list(dict.fromkeys(parsed))
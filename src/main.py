@@ -1,15 +1,53 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.routers.v1 import (
     building as building_v1,
     activity as activity_v1,
     organization as organization_v1,
+    changes as changes_v1,
+    events as events_v1,
+    export as export_v1,
+    metrics as metrics_v1,
+    jobs as jobs_v1,
 )
+from src.config import settings
+from src.database import dispose_engine, get_engine
+from src.utils.api_keys import api_key_registry
+from src.utils.compression import CompressionMiddleware
+from src.utils.directory_cache import directory_cache
+from src.utils.geolocation import stop_http_client
+from src.utils.jobs import job_queue
+from src.utils.notifications import broadcaster
+from src.utils.response_cache import response_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_engine()
+    if not settings.SNAPSHOT_PATH:
+        broadcaster.add_callback(directory_cache.handle_change)
+        broadcaster.add_callback(api_key_registry.handle_change)
+        broadcaster.add_callback(response_cache.handle_change)
+        await broadcaster.start()
+        await job_queue.start()
+    # В офлайн-режиме ключи читаются из снимка и перечитываются по таймеру.
+    await api_key_registry.start()
+    await directory_cache.warm()
+    yield
+    await job_queue.stop()
+    await api_key_registry.stop()
+    await broadcaster.stop()
+    await stop_http_client()
+    await dispose_engine()
+
 
 app = FastAPI(
     title="Organization Directory API",
     version="1.0.0",
     description="REST API для справочника организаций, зданий и видов деятельности",
+    lifespan=lifespan,
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
 
 app.include_router(
     building_v1.router, prefix="/api/v1/buildings", tags=["Buildings v1"]
@@ -20,3 +58,8 @@ app.include_router(
 app.include_router(
     organization_v1.router, prefix="/api/v1/organizations", tags=["Organizations v1"]
 )
+app.include_router(changes_v1.router, prefix="/api/v1/changes", tags=["Changes v1"])
+app.include_router(events_v1.router, prefix="/api/v1/events", tags=["Events v1"])
+app.include_router(export_v1.router, prefix="/api/v1/export", tags=["Export v1"])
+app.include_router(metrics_v1.router, prefix="/api/v1/metrics", tags=["Metrics v1"])
+app.include_router(jobs_v1.router, prefix="/api/v1/jobs", tags=["Jobs v1"])
@@ -1,4 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Table, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Integer,
+    String,
+    Float,
+    DateTime,
+    ForeignKey,
+    Index,
+    JSON,
+    SmallInteger,
+    Table,
+    func,
+)
 from sqlalchemy.orm import relationship
 from src.database import Base
 
@@ -7,18 +21,24 @@ organization_activities = Table(
     Base.metadata,
     Column("organization_id", ForeignKey("organizations.id"), primary_key=True),
     Column("activity_id", ForeignKey("activities.id"), primary_key=True),
+    Index("ix_organization_activities_activity_id", "activity_id"),
 )
 
 
 class Building(Base):
     __tablename__ = "buildings"
+    __table_args__ = (Index("ix_buildings_updated_at_id", "updated_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     address = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
     organizations = relationship(
         "Organization",
         back_populates="building",
@@ -28,12 +48,17 @@ class Building(Base):
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (Index("ix_activities_updated_at_id", "updated_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
-    parent_id = Column(Integer, ForeignKey("activities.id"), nullable=True)
+    parent_id = Column(Integer, ForeignKey("activities.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
     parent = relationship(
         "Activity",
         remote_side=[id],
@@ -55,13 +80,18 @@ class Activity(Base):
 
 class Organization(Base):
     __tablename__ = "organizations"
+    __table_args__ = (Index("ix_organizations_updated_at_id", "updated_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     phone_numbers = Column(String)
-    building_id = Column(Integer, ForeignKey("buildings.id"), nullable=True)
+    building_id = Column(Integer, ForeignKey("buildings.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
     building = relationship(
         "Building",
         back_populates="organizations",
@@ -73,3 +103,84 @@ class Organization(Base):
         back_populates="organizations",
         lazy="selectin",
     )
+
+
+class DeletedEntity(Base):
+    """
+    Tombstone удалённой записи для ленты изменений.
+    Заполняется триггерами БД при удалении зданий, активностей и организаций.
+    """
+
+    __tablename__ = "deleted_entities"
+    __table_args__ = (Index("ix_deleted_entities_deleted_at_id", "deleted_at", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class DirectoryVersion(Base):
+    """
+    Счётчик изменений справочника для версии экспорта. Увеличивается
+    statement-level триггерами на зданиях, видах деятельности, организациях
+    и их связях; виден только после коммита изменившей его транзакции.
+    Разбит на ячейки (`slot`), версия — сумма ячеек.
+    """
+
+    __tablename__ = "directory_version"
+
+    slot = Column(SmallInteger, primary_key=True)
+    changes = Column(BigInteger, nullable=False)
+
+
+class ApiKey(Base):
+    """
+    Клиентский API-ключ. Хранится только SHA-256 хэш ключа;
+    `rate_limit` (запросов в секунду) и `burst` задают квоту token bucket,
+    пустой `rate_limit` означает отсутствие ограничения, нулевой блокирует ключ.
+    """
+
+    __tablename__ = "api_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    key_hash = Column(String(64), nullable=False, unique=True, index=True)
+    rate_limit = Column(Float, nullable=True)
+    burst = Column(Integer, nullable=False, default=1)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+class Job(Base):
+    """
+    Фоновая задача. Переживает перезапуски: воркеры забирают задачи из таблицы
+    через `FOR UPDATE SKIP LOCKED` и держат аренду до `locked_until`.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), server_default=func.now())
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
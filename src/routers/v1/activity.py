@@ -1,37 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import insert, literal, select
+from sqlalchemy.exc import IntegrityError
 from src.database import get_db
 from src.models import Activity
-from src.schemas import ActivityCreate, ActivityResponse
-from src.dependencies import verify_api_key
+from src.schemas import (
+    ActivityBatchResponse,
+    ActivityCreate,
+    ActivityResponse,
+    BatchRequest,
+)
+from src.dependencies import batch_ids, verify_api_key, require_primary_database
+from src.utils.directory_cache import directory_cache
+from src.utils.response_cache import response_cache
+from src.utils.single_flight import coalesce
 
 router = APIRouter()
 
+activity_list_adapter = TypeAdapter(list[ActivityResponse])
 
-def activity_to_dict(activity):
-    return {
-        "id": activity.id,
-        "name": activity.name,
-        "children": [
-            {
-                "id": child.id,
-                "name": child.name,
-                "children": [
-                    {"id": grandchild.id, "name": grandchild.name}
-                    for grandchild in child.children
-                ],
-            }
-            for child in activity.children
-        ],
-    }
+# Предел глубины обхода дерева: защищает рекурсивный запрос от циклов в parent_id.
+MAX_TREE_DEPTH = 64
+
+
+def activity_subtree_query(root_id: int | None, max_depth: int):
+    """
+    Один рекурсивный CTE: корень (или все корни) и потомки до глубины `max_depth`
+    плоским списком (id, name, parent_id, depth), родители раньше детей.
+    """
+    roots = select(
+        Activity.id, Activity.name, Activity.parent_id, literal(0).label("depth")
+    )
+    if root_id is None:
+        roots = roots.where(Activity.parent_id.is_(None))
+    else:
+        roots = roots.where(Activity.id == root_id)
+    tree = roots.cte("activity_tree", recursive=True)
+    tree = tree.union_all(
+        select(Activity.id, Activity.name, Activity.parent_id, tree.c.depth + 1)
+        .join(tree, Activity.parent_id == tree.c.id)
+        .where(tree.c.depth < max_depth)
+    )
+    return select(tree).order_by(tree.c.depth, tree.c.id)
+
+
+def build_activity_tree(rows) -> list[dict]:
+    """
+    Собирает дерево из плоского списка за один проход: каждый узел создаётся
+    один раз и подвешивается к уже собранному родителю.
+    """
+    nodes = {}
+    roots = []
+    for row in rows:
+        node = {"id": row.id, "name": row.name, "children": []}
+        nodes[row.id] = node
+        if row.depth == 0:
+            roots.append(node)
+        else:
+            nodes[row.parent_id]["children"].append(node)
+    return roots
 
 
 @router.post(
     "/",
     response_model=ActivityResponse,
-    dependencies=[Depends(verify_api_key)],
+    dependencies=[Depends(verify_api_key), Depends(require_primary_database)],
     description="Создание нового вида деятельности.",
 )
 async def create_activity(
@@ -39,76 +73,114 @@ async def create_activity(
 ):
     if activity_data.parent_id == 0:
         raise HTTPException(status_code=400, detail="parent_id=0 недопустим")
-    if activity_data.parent_id is not None:
-        parent_exists = await db.scalar(
-            select(Activity.id).where(Activity.id == activity_data.parent_id)
+
+    # Существование родителя проверяет внешний ключ, а ответ собирается из
+    # входных данных: у только что созданного вида деятельности нет потомков.
+    try:
+        activity_id = await db.scalar(
+            insert(Activity)
+            .values(name=activity_data.name, parent_id=activity_data.parent_id)
+            .returning(Activity.id)
         )
-        if not parent_exists:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Parent with id={activity_data.parent_id} does not exist",
-            )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Parent with id={activity_data.parent_id} does not exist",
+        )
+    directory_cache.note_change("activity", activity_id)
+    response_cache.invalidate()
+    return ActivityResponse(id=activity_id, name=activity_data.name, children=[])
 
-    new_activity = Activity(name=activity_data.name, parent_id=activity_data.parent_id)
-    db.add(new_activity)
-    await db.flush()
-    await db.commit()
-    await db.refresh(new_activity)
 
-    stmt = (
-        select(Activity)
-        .where(Activity.id == new_activity.id)
-        .options(selectinload(Activity.children).selectinload(Activity.children))
-    )
-    result = (await db.execute(stmt)).unique()
-    loaded_activity = result.scalars().first()
-    if not loaded_activity:
-        raise HTTPException(status_code=404, detail="Activity not found after creation")
-    return ActivityResponse(
-        id=loaded_activity.id,
-        name=loaded_activity.name,
-        children=[
-            {
-                "id": ch.id,
-                "name": ch.name,
-                "children": [
-                    {"id": grch.id, "name": grch.name} for grch in ch.children
-                ],
-            }
-            for ch in loaded_activity.children
+@router.get(
+    "/",
+    response_model=list[ActivityResponse],
+    dependencies=[Depends(verify_api_key)],
+    description="Получение списка всех видов деятельности.",
+)
+async def list_activities(request: Request):
+    async def load():
+        cache = await directory_cache.ensure_loaded()
+        return [
+            ActivityResponse(**cache.activity_tree(activity_id, depth=2))
+            for activity_id in cache.activities
+        ]
+
+    return await coalesce(request, activity_list_adapter, load)
+
+
+async def load_activities_batch(ids: list[int]) -> ActivityBatchResponse:
+    cache = await directory_cache.ensure_loaded()
+    ids = list(dict.fromkeys(ids))
+    return ActivityBatchResponse(
+        items=[
+            ActivityResponse(**cache.activity_tree(activity_id, depth=2))
+            for activity_id in ids
+            if activity_id in cache.activities
+        ],
+        missing=[
+            activity_id for activity_id in ids if activity_id not in cache.activities
         ],
     )
 
 
 @router.get(
-    "/",
+    "/batch",
+    response_model=ActivityBatchResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Получение видов деятельности по списку идентификаторов (`?ids=1,2,3`).",
+)
+async def get_activities_batch(ids: list[int] = Depends(batch_ids)):
+    return await load_activities_batch(ids)
+
+
+@router.post(
+    "/batch",
+    response_model=ActivityBatchResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Получение видов деятельности по списку идентификаторов из тела запроса.",
+)
+async def post_activities_batch(batch: BatchRequest):
+    return await load_activities_batch(batch.ids)
+
+
+@router.get(
+    "/tree",
     response_model=list[ActivityResponse],
     dependencies=[Depends(verify_api_key)],
-    description="Получение списка всех видов деятельности.",
+    description="Дерево видов деятельности произвольной глубины: все корни или поддерево "
+    "`root_id`, не глубже `max_depth` уровней. Каждый узел входит в ответ один раз. "
+    f"Без `max_depth` дерево глубже {MAX_TREE_DEPTH} уровней не обрезается, а даёт 400.",
 )
-async def list_activities(db: AsyncSession = Depends(get_db)):
-    stmt = select(Activity).options(
-        selectinload(Activity.children).selectinload(Activity.children)
-    )
-    result = (await db.execute(stmt)).unique()
-    activities = result.scalars().all()
-    return [
-        ActivityResponse(
-            id=a.id,
-            name=a.name,
-            children=[
-                {
-                    "id": ch.id,
-                    "name": ch.name,
-                    "children": [
-                        {"id": grch.id, "name": grch.name} for grch in ch.children
-                    ],
-                }
-                for ch in a.children
-            ],
-        )
-        for a in activities
-    ]
+async def get_activity_tree(
+    request: Request,
+    root_id: int = Query(
+        None, description="Корень поддерева (по умолчанию — все корни)"
+    ),
+    max_depth: int = Query(
+        None, ge=0, le=MAX_TREE_DEPTH, description="Глубина (по умолчанию — всё дерево)"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    async def load():
+        # Без max_depth читаем на уровень глубже предела: лишний уровень означает,
+        # что дерево пришлось бы молча обрезать.
+        depth = MAX_TREE_DEPTH + 1 if max_depth is None else max_depth
+        rows = (await db.execute(activity_subtree_query(root_id, depth))).all()
+        if rows and rows[-1].depth > MAX_TREE_DEPTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Activity tree is deeper than {MAX_TREE_DEPTH} levels, "
+                "pass max_depth to get a truncated tree.",
+            )
+        roots = build_activity_tree(rows)
+        if root_id is not None and not roots:
+            raise HTTPException(status_code=404, detail="Activity not found")
+        return [ActivityResponse.model_validate(root) for root in roots]
+
+    return await coalesce(request, activity_list_adapter, load)
 
 
 @router.get(
@@ -117,27 +189,9 @@ async def list_activities(db: AsyncSession = Depends(get_db)):
     dependencies=[Depends(verify_api_key)],
     description="Получение информации о виде деятельности по ID.",
 )
-async def get_activity(activity_id: int, db: AsyncSession = Depends(get_db)):
-    stmt = (
-        select(Activity)
-        .where(Activity.id == activity_id)
-        .options(selectinload(Activity.children).selectinload(Activity.children))
-    )
-    result = (await db.execute(stmt)).unique()
-    activity = result.scalars().first()
+async def get_activity(activity_id: int):
+    cache = await directory_cache.ensure_loaded()
+    activity = cache.activity_tree(activity_id, depth=2)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
-    return ActivityResponse(
-        id=activity.id,
-        name=activity.name,
-        children=[
-            {
-                "id": ch.id,
-                "name": ch.name,
-                "children": [
-                    {"id": grch.id, "name": grch.name} for grch in ch.children
-                ],
-            }
-            for ch in activity.children
-        ],
-    )
+    return ActivityResponse(**activity)
@@ -1,14 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from src.database import get_db
-from src.models import Building
-from src.schemas import BuildingCreate, BuildingResponse
-from src.dependencies import verify_api_key
-from src.utils.geolocation import get_coordinates_from_city
+from sqlalchemy import func, insert, select
+from src.database import get_db, ids_filter
+from src.models import Building, Organization
+from src.schemas import (
+    BatchRequest,
+    BuildingBatchResponse,
+    BuildingCluster,
+    BuildingClustersResponse,
+    BuildingCreate,
+    BuildingResponse,
+    JobResponse,
+)
+from src.dependencies import batch_ids, verify_api_key, require_primary_database
+from src.utils.geolocation import GeocodingError, get_coordinates_from_city
+from src.utils.directory_cache import directory_cache
+from src.utils.response_cache import response_cache
+from src.utils.jobs import PermanentJobError, job_queue
+from src.utils.single_flight import coalesce
 
 router = APIRouter()
 
+building_list_adapter = TypeAdapter(list[BuildingResponse])
+building_clusters_adapter = TypeAdapter(BuildingClustersResponse)
+
+# Ячеек сетки на ширину тайла карты: при тайле 256px кластер занимает ~32px.
+CLUSTER_CELLS_PER_TILE = 8
+MAX_CLUSTER_ZOOM = 22
+
+
+def cluster_cell_degrees(zoom: int) -> float:
+    return 360.0 / (2**zoom * CLUSTER_CELLS_PER_TILE)
+
 
 @router.get(
     "/",
@@ -16,9 +41,127 @@ router = APIRouter()
     dependencies=[Depends(verify_api_key)],
     description="Получение списка всех зданий.",
 )
-async def list_buildings(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Building))
-    return result.scalars().all()
+async def list_buildings(request: Request, db: AsyncSession = Depends(get_db)):
+    async def load():
+        result = await db.execute(
+            select(Building.id, Building.address, Building.latitude, Building.longitude)
+        )
+        return [BuildingResponse.model_validate(row) for row in result.all()]
+
+    return await coalesce(request, building_list_adapter, load)
+
+
+async def load_buildings_batch(
+    ids: list[int], db: AsyncSession
+) -> BuildingBatchResponse:
+    ids = list(dict.fromkeys(ids))
+    result = await db.execute(
+        select(
+            Building.id, Building.address, Building.latitude, Building.longitude
+        ).where(ids_filter(Building.id, ids))
+    )
+    found = {row.id: row for row in result.all()}
+    return BuildingBatchResponse(
+        items=[
+            BuildingResponse.model_validate(found[building_id])
+            for building_id in ids
+            if building_id in found
+        ],
+        missing=[building_id for building_id in ids if building_id not in found],
+    )
+
+
+@router.get(
+    "/batch",
+    response_model=BuildingBatchResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Получение зданий по списку идентификаторов (`?ids=1,2,3`) одним запросом к БД.",
+)
+async def get_buildings_batch(
+    ids: list[int] = Depends(batch_ids), db: AsyncSession = Depends(get_db)
+):
+    return await load_buildings_batch(ids, db)
+
+
+@router.post(
+    "/batch",
+    response_model=BuildingBatchResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Получение зданий по списку идентификаторов из тела запроса (для больших наборов).",
+)
+async def post_buildings_batch(batch: BatchRequest, db: AsyncSession = Depends(get_db)):
+    return await load_buildings_batch(batch.ids, db)
+
+
+@router.get(
+    "/clusters",
+    response_model=BuildingClustersResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Кластеры зданий для карты: сетка, размер ячейки которой зависит от `zoom`; "
+    "для каждой ячейки — центроид, число зданий и организаций. Считается в БД через "
+    "`GROUP BY` по квантованным координатам.",
+)
+async def get_building_clusters(
+    request: Request,
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=MAX_CLUSTER_ZOOM),
+    db: AsyncSession = Depends(get_db),
+):
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(
+            status_code=400,
+            detail="'min_lat, min_lon' must not exceed 'max_lat, max_lon'",
+        )
+    cell = cluster_cell_degrees(zoom)
+
+    async def load():
+        per_building = (
+            select(
+                Building.id,
+                Building.latitude,
+                Building.longitude,
+                func.count(Organization.id).label("organizations"),
+            )
+            .outerjoin(Organization, Organization.building_id == Building.id)
+            .where(
+                Building.latitude.between(min_lat, max_lat),
+                Building.longitude.between(min_lon, max_lon),
+            )
+            .group_by(Building.id)
+            .subquery()
+        )
+        row = func.floor(per_building.c.latitude / cell)
+        column = func.floor(per_building.c.longitude / cell)
+        result = await db.execute(
+            select(
+                func.avg(per_building.c.latitude).label("latitude"),
+                func.avg(per_building.c.longitude).label("longitude"),
+                func.count().label("buildings"),
+                func.sum(per_building.c.organizations).label("organizations"),
+                func.min(per_building.c.id).label("building_id"),
+            )
+            .group_by(row, column)
+            .order_by(row, column)
+        )
+        return BuildingClustersResponse(
+            zoom=zoom,
+            cell_degrees=cell,
+            clusters=[
+                BuildingCluster(
+                    latitude=cluster.latitude,
+                    longitude=cluster.longitude,
+                    buildings=cluster.buildings,
+                    organizations=cluster.organizations,
+                    building_id=cluster.building_id if cluster.buildings == 1 else None,
+                )
+                for cluster in result.all()
+            ],
+        )
+
+    return await coalesce(request, building_clusters_adapter, load)
 
 
 @router.get(
@@ -34,23 +177,75 @@ async def get_building(building_id: int, db: AsyncSession = Depends(get_db)):
     return building
 
 
+def building_created(result: dict) -> None:
+    directory_cache.note_change("building", result["building_id"])
+    response_cache.invalidate()
+
+
+@job_queue.handler("geocode_building", after_commit=building_created)
+async def geocode_building(db: AsyncSession, payload: dict) -> dict:
+    """
+    Фоновое создание здания: геокодирование адреса и вставка записи.
+    Сбой геокодера (GeocodingError) повторяется очередью с задержкой;
+    ненайденный адрес повторять бессмысленно. Вставка фиксируется одной
+    транзакцией с отметкой о выполнении задачи, и только если аренда задачи
+    не перешла к другому воркеру, поэтому здание создаётся один раз.
+    """
+    coords = await get_coordinates_from_city(payload["address"])
+    if not coords:
+        raise PermanentJobError("Не удалось определить координаты по адресу")
+    lat, lon = coords
+    building_id = await db.scalar(
+        insert(Building)
+        .values(address=payload["address"], latitude=lat, longitude=lon)
+        .returning(Building.id)
+    )
+    return {"building_id": building_id}
+
+
 @router.post(
     "/",
     response_model=BuildingResponse,
-    dependencies=[Depends(verify_api_key)],
-    description="Создание нового здания (адрес + автоматическое получение координат).",
+    responses={202: {"model": JobResponse}},
+    dependencies=[Depends(verify_api_key), Depends(require_primary_database)],
+    description="Создание нового здания (адрес + автоматическое получение координат). "
+    "С `?async=true` сразу возвращает 202 и фоновую задачу, статус которой "
+    "доступен по `/api/v1/jobs/{id}`.",
 )
 async def create_building(
-    building_data: BuildingCreate, db: AsyncSession = Depends(get_db)
+    building_data: BuildingCreate,
+    async_: bool = Query(
+        False, alias="async", description="Геокодировать адрес в фоновой задаче"
+    ),
+    db: AsyncSession = Depends(get_db),
 ):
-    coords = await get_coordinates_from_city(building_data.address)
+    if async_:
+        job = await job_queue.enqueue(
+            db, "geocode_building", {"address": building_data.address}
+        )
+        return JSONResponse(
+            status_code=202,
+            content=JobResponse.model_validate(job).model_dump(mode="json"),
+            headers={"Location": f"/api/v1/jobs/{job.id}"},
+        )
+
+    try:
+        coords = await get_coordinates_from_city(building_data.address)
+    except GeocodingError:
+        raise HTTPException(status_code=503, detail="Геокодер временно недоступен")
     if not coords:
         raise HTTPException(
             status_code=400, detail="Не удалось определить координаты по адресу"
         )
     lat, lon = coords
-    new_building = Building(address=building_data.address, latitude=lat, longitude=lon)
-    db.add(new_building)
+    building_id = await db.scalar(
+        insert(Building)
+        .values(address=building_data.address, latitude=lat, longitude=lon)
+        .returning(Building.id)
+    )
     await db.commit()
-    await db.refresh(new_building)
-    return new_building
+    directory_cache.note_change("building", building_id)
+    response_cache.invalidate()
+    return BuildingResponse(
+        id=building_id, address=building_data.address, latitude=lat, longitude=lon
+    )
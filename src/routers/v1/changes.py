@@ -0,0 +1,231 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, text, tuple_, true
+from src.database import get_db, get_engine
+from src.routers.v1.export import EXPORT_APPLICATION_NAME
+from src.models import (
+    Activity,
+    Building,
+    DeletedEntity,
+    Organization,
+    organization_activities,
+)
+from src.schemas import (
+    ActivityChange,
+    BuildingChange,
+    ChangesResponse,
+    DeletedEntityResponse,
+    OrganizationChange,
+)
+from src.dependencies import verify_api_key
+
+router = APIRouter()
+
+# Порядок сущностей внутри одной временной метки; входит в токен курсора.
+BUILDING_RANK = 0
+ACTIVITY_RANK = 1
+ORGANIZATION_RANK = 2
+DELETED_RANK = 3
+
+
+def encode_token(timestamp: datetime, rank: int, entity_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{rank}|{entity_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token: str) -> tuple[datetime, int, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        timestamp, rank, entity_id = (
+            base64.urlsafe_b64decode(padded).decode().split("|")
+        )
+        return datetime.fromisoformat(timestamp), int(rank), int(entity_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid 'since' token")
+
+
+# Начало самой старой открытой транзакции в этой БД, которая может писать:
+# текущая транзакция учитывается через now(), выгрузка /export/ идёт в
+# транзакции только на чтение и границу не держит.
+HORIZON_QUERY = text(
+    "SELECT least(now(), min(xact_start)) FROM pg_stat_activity "
+    "WHERE datname = current_database() "
+    "AND pid <> pg_backend_pid() "
+    "AND backend_type = 'client backend' "
+    "AND xact_start IS NOT NULL "
+    f"AND application_name <> '{EXPORT_APPLICATION_NAME}'"
+)
+
+
+async def change_horizon(db: AsyncSession) -> Optional[datetime]:
+    """
+    Граница ленты. `updated_at` и `deleted_at` — время начала транзакции
+    (`now()`), а видна строка становится только после коммита, поэтому
+    транзакция, начатая раньше последней выданной строки, может закоммитить
+    строку «позади» курсора клиента. Лента отдаёт только строки старше начала
+    самой старой открытой транзакции: все они уже закоммичены. Граница читается
+    до выборки строк. Долгая транзакция в этой БД (в том числе незакрытая
+    «idle in transaction») задерживает ленту до своего завершения.
+    В снимке SQLite открытых транзакций записи нет.
+    """
+    if get_engine().dialect.name != "postgresql":
+        return None
+    return await db.scalar(HORIZON_QUERY)
+
+
+def after_cursor(ts_column, id_column, rank: int, cursor, horizon=None):
+    """
+    Условие «строка идёт после курсора» в порядке (timestamp, rank, id)
+    и раньше границы ленты `horizon`.
+    """
+    before_horizon = true() if horizon is None else ts_column < horizon
+    if cursor is None:
+        return before_horizon
+    cursor_ts, cursor_rank, cursor_id = cursor
+    if rank > cursor_rank:
+        return and_(ts_column >= cursor_ts, before_horizon)
+    if rank < cursor_rank:
+        return and_(ts_column > cursor_ts, before_horizon)
+    return and_(
+        tuple_(ts_column, id_column) > tuple_(cursor_ts, cursor_id), before_horizon
+    )
+
+
+@router.get(
+    "/",
+    response_model=ChangesResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Лента изменений: здания, виды деятельности и организации, созданные или изменённые после токена `since`, а также удалённые записи.",
+)
+async def list_changes(
+    since: str = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+):
+    cursor = decode_token(since) if since else None
+    horizon = await change_horizon(db)
+    changes = []
+
+    buildings = await db.execute(
+        select(
+            Building.id,
+            Building.address,
+            Building.latitude,
+            Building.longitude,
+            Building.updated_at,
+        )
+        .where(
+            after_cursor(
+                Building.updated_at, Building.id, BUILDING_RANK, cursor, horizon
+            )
+        )
+        .order_by(Building.updated_at, Building.id)
+        .limit(limit + 1)
+    )
+    changes += [(row.updated_at, BUILDING_RANK, row.id, row) for row in buildings.all()]
+
+    activities = await db.execute(
+        select(Activity.id, Activity.name, Activity.parent_id, Activity.updated_at)
+        .where(
+            after_cursor(
+                Activity.updated_at, Activity.id, ACTIVITY_RANK, cursor, horizon
+            )
+        )
+        .order_by(Activity.updated_at, Activity.id)
+        .limit(limit + 1)
+    )
+    changes += [
+        (row.updated_at, ACTIVITY_RANK, row.id, row) for row in activities.all()
+    ]
+
+    organizations = await db.execute(
+        select(
+            Organization.id,
+            Organization.name,
+            Organization.phone_numbers,
+            Organization.building_id,
+            Organization.updated_at,
+        )
+        .where(
+            after_cursor(
+                Organization.updated_at,
+                Organization.id,
+                ORGANIZATION_RANK,
+                cursor,
+                horizon,
+            )
+        )
+        .order_by(Organization.updated_at, Organization.id)
+        .limit(limit + 1)
+    )
+    changes += [
+        (row.updated_at, ORGANIZATION_RANK, row.id, row) for row in organizations.all()
+    ]
+
+    deleted = await db.execute(
+        select(
+            DeletedEntity.id,
+            DeletedEntity.entity_type,
+            DeletedEntity.entity_id,
+            DeletedEntity.deleted_at,
+        )
+        .where(
+            after_cursor(
+                DeletedEntity.deleted_at,
+                DeletedEntity.id,
+                DELETED_RANK,
+                cursor,
+                horizon,
+            )
+        )
+        .order_by(DeletedEntity.deleted_at, DeletedEntity.id)
+        .limit(limit + 1)
+    )
+    changes += [(row.deleted_at, DELETED_RANK, row.id, row) for row in deleted.all()]
+
+    changes.sort(key=lambda change: change[:3])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    page = ChangesResponse(has_more=has_more, next_token=since)
+    if changes:
+        page.next_token = encode_token(*changes[-1][:3])
+
+    organization_ids = [c[2] for c in changes if c[1] == ORGANIZATION_RANK]
+    activity_ids = {org_id: [] for org_id in organization_ids}
+    if organization_ids:
+        links = await db.execute(
+            select(
+                organization_activities.c.organization_id,
+                organization_activities.c.activity_id,
+            ).where(organization_activities.c.organization_id.in_(organization_ids))
+        )
+        for org_id, activity_id in links.all():
+            activity_ids[org_id].append(activity_id)
+
+    for _, rank, _, row in changes:
+        if rank == BUILDING_RANK:
+            page.buildings.append(BuildingChange.model_validate(row))
+        elif rank == ACTIVITY_RANK:
+            page.activities.append(ActivityChange.model_validate(row))
+        elif rank == ORGANIZATION_RANK:
+            page.organizations.append(
+                OrganizationChange(
+                    id=row.id,
+                    name=row.name,
+                    phone_numbers=row.phone_numbers.split(",")
+                    if row.phone_numbers
+                    else [],
+                    building_id=row.building_id,
+                    activity_ids=activity_ids[row.id],
+                    updated_at=row.updated_at,
+                )
+            )
+        else:
+            page.deleted.append(DeletedEntityResponse.model_validate(row))
+
+    return page
@@ -0,0 +1,47 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from src.dependencies import verify_api_key, require_primary_database
+from src.utils.notifications import RESYNC_ENTITY, broadcaster
+
+router = APIRouter()
+
+KEEPALIVE_SECONDS = 15
+PUBLIC_ENTITIES = {"building", "activity", "organization"}
+
+
+async def event_stream():
+    """
+    События `change` по отдельным записям и `resync`, когда часть событий
+    потеряна (переподключение слушателя к БД, переполнение очереди клиента).
+    Идентификаторов событий нет: после `resync` и после переподключения
+    к потоку клиент догоняет изменения по ленте `/changes/` со своего токена.
+    """
+    async with broadcaster.subscribe() as queue:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event.get("entity") == RESYNC_ENTITY:
+                yield f"event: resync\ndata: {json.dumps(event)}\n\n"
+                continue
+            if event.get("entity") not in PUBLIC_ENTITIES:
+                continue
+            yield f"event: change\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get(
+    "/",
+    dependencies=[Depends(verify_api_key), Depends(require_primary_database)],
+    description="Поток событий об изменениях справочника (Server-Sent Events).",
+)
+async def stream_events():
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import zlib
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from src.database import get_db, get_engine
+from src.models import DirectoryVersion
+from src.dependencies import verify_api_key, require_primary_database
+
+router = APIRouter()
+
+# Выполняется как `COPY (...) TO STDOUT`. Каждая строка — один JSON-объект;
+# JSON экранирует управляющие символы, поэтому в текстовом формате COPY
+# остаётся только удвоение обратного слэша.
+SNAPSHOT_QUERY = """
+SELECT json_build_object(
+    'type', 'building', 'id', b.id, 'address', b.address,
+    'latitude', b.latitude, 'longitude', b.longitude
+)::text
+FROM buildings b
+UNION ALL
+SELECT json_build_object(
+    'type', 'activity', 'id', a.id, 'name', a.name, 'parent_id', a.parent_id
+)::text
+FROM activities a
+UNION ALL
+SELECT json_build_object(
+    'type', 'organization', 'id', o.id, 'name', o.name,
+    'phone_numbers',
+    COALESCE(to_json(string_to_array(o.phone_numbers, ',')), '[]'::json),
+    'building_id', o.building_id,
+    'activity_ids',
+    COALESCE(
+        (
+            SELECT json_agg(oa.activity_id ORDER BY oa.activity_id)
+            FROM organization_activities oa
+            WHERE oa.organization_id = o.id
+        ),
+        '[]'::json
+    )
+)::text
+FROM organizations o
+"""
+
+COMPRESSION_LEVEL = 6
+# application_name транзакции выгрузки: она только читает, поэтому граница
+# ленты изменений (/changes/) её не ждёт.
+EXPORT_APPLICATION_NAME = "directory-export"
+CHUNK_QUEUE_SIZE = 16
+
+
+async def snapshot_version(db: AsyncSession) -> str:
+    """
+    Версия снимка: хэш счётчика изменений справочника. Счётчик увеличивают
+    триггеры каждой записывающей транзакции, и новое значение видно с её
+    коммитом, поэтому версия меняется и при поздних коммитах, и при изменении
+    одних только связей организаций с видами деятельности.
+    """
+    changes = await db.scalar(
+        select(func.coalesce(func.sum(DirectoryVersion.changes), 0))
+    )
+    return hashlib.sha1(f"changes:{changes}".encode()).hexdigest()[:20]
+
+
+async def stream_snapshot():
+    """
+    Потоково выгружает строки через `COPY ... TO STDOUT` и сжимает их в gzip на лету.
+    """
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=CHUNK_QUEUE_SIZE)
+
+    async def copy_rows():
+        try:
+            async with get_engine().connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver = raw.driver_connection
+                async with driver.transaction(readonly=True):
+                    await driver.execute(
+                        f"SET LOCAL application_name = '{EXPORT_APPLICATION_NAME}'"
+                    )
+                    await driver.copy_from_query(SNAPSHOT_QUERY, output=chunks.put)
+            await chunks.put(None)
+        except Exception as exc:
+            await chunks.put(exc)
+
+    task = asyncio.create_task(copy_rows())
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+    tail = b""
+    try:
+        while True:
+            chunk = await chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if chunk is None:
+                break
+            lines, _, tail = (tail + chunk).rpartition(b"\n")
+            if lines:
+                compressed = compressor.compress(lines.replace(b"\\\\", b"\\") + b"\n")
+                if compressed:
+                    yield compressed
+        yield compressor.compress(tail.replace(b"\\\\", b"\\"))
+        yield compressor.flush()
+    finally:
+        task.cancel()
+
+
+@router.get(
+    "/",
+    dependencies=[Depends(verify_api_key), Depends(require_primary_database)],
+    description="Полный снимок справочника (здания, виды деятельности, организации со связями) в формате NDJSON, сжатом gzip. Поддерживает `If-None-Match`.",
+)
+async def export_snapshot(
+    if_none_match: str = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    version = await snapshot_version(db)
+    etag = f'"{version}"'
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    return StreamingResponse(
+        stream_snapshot(),
+        media_type="application/gzip",
+        headers={
+            "ETag": etag,
+            "Content-Disposition": f'attachment; filename="directory-{version}.ndjson.gz"',
+        },
+    )
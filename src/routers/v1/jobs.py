@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import get_db
+from src.dependencies import verify_api_key, require_primary_database
+from src.models import Job
+from src.schemas import JobResponse
+
+router = APIRouter()
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    dependencies=[Depends(verify_api_key), Depends(require_primary_database)],
+    description="Получение состояния фоновой задачи по ID.",
+)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
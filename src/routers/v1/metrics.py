@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from src.dependencies import verify_api_key
+from src.utils.compression import compression
+from src.utils.jobs import job_queue
+from src.utils.response_cache import response_cache
+from src.utils.single_flight import single_flight
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    dependencies=[Depends(verify_api_key)],
+    description="Метрики текущего процесса: объединение одинаковых запросов (single-flight), "
+    "кэш ответов, сжатие (включая процессорное время) и фоновые задачи.",
+)
+async def get_metrics():
+    return {
+        "single_flight": single_flight.stats(),
+        "response_cache": response_cache.stats(),
+        "compression": compression.stats(),
+        "jobs": job_queue.stats(),
+    }
@@ -1,17 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select
-from src.database import get_db
-from src.models import Organization, Activity, Building
-from src.schemas import OrganizationCreate, OrganizationResponse
-from src.dependencies import verify_api_key
-from src.utils.distance import calculate_distance
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from src.database import get_db, ids_filter
+from src.models import Organization, Activity, Building, organization_activities
+from src.schemas import (
+    BatchRequest,
+    NormalizedOrganizationList,
+    OrganizationBatchResponse,
+    OrganizationCreate,
+    OrganizationResponse,
+)
+from src.dependencies import batch_ids, verify_api_key, require_primary_database
+from src.utils.directory_cache import directory_cache
+from src.utils.response_cache import response_cache
+from src.utils.single_flight import coalesce
 
 router = APIRouter()
 
+organization_list_adapter = TypeAdapter(list[OrganizationResponse])
+normalized_organization_list_adapter = TypeAdapter(NormalizedOrganizationList)
+
+ListFormat = Literal["full", "normalized"]
+LIST_FORMAT_QUERY = Query(
+    "full",
+    alias="format",
+    description="`normalized` — организации со ссылками `building_id` и `activity_ids` "
+    "и словари `buildings` и `activities`, где каждая сущность встречается один раз",
+)
+
+# Здание и три уровня видов деятельности — всё, что нужно serialize_organization.
+# Виды деятельности организации отдаются с потомками до ACTIVITY_DEPTH уровней;
+# загружается на уровень больше, чтобы сериализация не обращалась к БД лениво.
+ACTIVITY_DEPTH = 3
+ORGANIZATION_LOAD_OPTIONS = (
+    selectinload(Organization.building),
+    selectinload(Organization.activities)
+    .selectinload(Activity.children)
+    .selectinload(Activity.children)
+    .selectinload(Activity.children),
+)
 
-def serialize_activity(activity, depth=3):
+
+def serialize_activity(activity, depth=ACTIVITY_DEPTH):
     if depth == 0:
         return {
             "id": activity.id,
@@ -44,13 +79,82 @@ def serialize_organization(org):
     }
 
 
+def list_adapter(format_: ListFormat) -> TypeAdapter:
+    if format_ == "normalized":
+        return normalized_organization_list_adapter
+    return organization_list_adapter
+
+
+async def load_normalized_organizations(
+    db: AsyncSession, stmt
+) -> NormalizedOrganizationList:
+    """
+    Нормализованный список по отфильтрованному запросу `select(Organization)`:
+    один запрос по колонкам организаций и их связей с видами деятельности и один
+    проход по строкам; здания и виды деятельности берутся из кэша справочника.
+    """
+    links = organization_activities.alias("links")
+    rows = await db.execute(
+        stmt.with_only_columns(
+            Organization.id,
+            Organization.name,
+            Organization.phone_numbers,
+            Organization.building_id,
+            links.c.activity_id,
+        ).outerjoin(links, links.c.organization_id == Organization.id)
+    )
+
+    organizations: dict[int, dict] = {}
+    building_ids: set[int] = set()
+    activity_ids: set[int] = set()
+    for org_id, name, phone_numbers, building_id, activity_id in rows:
+        org = organizations.get(org_id)
+        if org is None:
+            org = organizations[org_id] = {
+                "id": org_id,
+                "name": name,
+                "phone_numbers": phone_numbers.split(",") if phone_numbers else [],
+                "building_id": building_id,
+                "activity_ids": [],
+            }
+            if building_id is not None:
+                building_ids.add(building_id)
+        if activity_id is not None:
+            org["activity_ids"].append(activity_id)
+            activity_ids.add(activity_id)
+
+    cache = await directory_cache.ensure_loaded()
+    if not (
+        building_ids <= cache.buildings.keys()
+        and activity_ids <= cache.activities.keys()
+    ):
+        # Кэш ещё не получил событие о новом здании или виде деятельности.
+        for building_id in building_ids - cache.buildings.keys():
+            directory_cache.note_change("building", building_id)
+        for activity_id in activity_ids - cache.activities.keys():
+            directory_cache.note_change("activity", activity_id)
+        cache = await directory_cache.ensure_loaded()
+    return NormalizedOrganizationList.model_validate(
+        {
+            "organizations": list(organizations.values()),
+            "buildings": {
+                building_id: cache.building(building_id)
+                for building_id in building_ids
+                if building_id in cache.buildings
+            },
+            "activities": cache.activity_nodes(activity_ids, depth=ACTIVITY_DEPTH),
+        }
+    )
+
+
 @router.get(
     "/search",
-    response_model=list[OrganizationResponse],
+    response_model=list[OrganizationResponse] | NormalizedOrganizationList,
     dependencies=[Depends(verify_api_key)],
     description="Поиск организаций по координатам или названию города.",
 )
 async def search_organizations(
+    request: Request,
     city: str = Query(None),
     base_lat: float = Query(None),
     base_lon: float = Query(None),
@@ -59,167 +163,246 @@ async def search_organizations(
     max_lat: float = Query(None),
     min_lon: float = Query(None),
     max_lon: float = Query(None),
+    format_: ListFormat = LIST_FORMAT_QUERY,
     db: AsyncSession = Depends(get_db),
 ):
-    if not (
-        city
-        or (
-            (base_lat is not None and base_lon is not None and radius_km is not None)
-            or (
-                min_lat is not None
-                and max_lat is not None
-                and min_lon is not None
-                and max_lon is not None
-            )
-        )
-    ):
+    has_radius = base_lat is not None and base_lon is not None and radius_km is not None
+    has_bbox = (
+        min_lat is not None
+        and max_lat is not None
+        and min_lon is not None
+        and max_lon is not None
+    )
+    if not (city or has_radius or has_bbox):
         raise HTTPException(
             status_code=400,
             detail="At least one of 'city', 'base_lat, base_lon, radius_km' or 'min_lat, max_lat, min_lon, max_lon' must be provided.",
         )
 
-    stmt = select(Organization).options(
-        selectinload(Organization.building),
-        selectinload(Organization.activities)
-        .selectinload(Activity.children)
-        .selectinload(Activity.children),
-    )
+    async def load():
+        stmt = select(Organization)
 
-    result = await db.execute(stmt)
-    organizations = result.scalars().all()
-
-    if (
-        min_lat is not None
-        and max_lat is not None
-        and min_lon is not None
-        and max_lon is not None
-    ):
-        organizations = [
-            org
-            for org in organizations
-            if org.building
-            and min_lat <= org.building.latitude <= max_lat
-            and min_lon <= org.building.longitude <= max_lon
-        ]
+        if has_bbox or has_radius:
+            # Широкий bbox или радиус даёт тысячи зданий: один параметр-массив
+            # вместо параметра на каждый id (у asyncpg предел — 32767).
+            cache = await directory_cache.ensure_loaded()
+            building_ids = None
+            if has_bbox:
+                building_ids = set(
+                    cache.buildings_in_bbox(min_lat, max_lat, min_lon, max_lon)
+                )
+            if has_radius:
+                in_radius = cache.buildings_within_radius(base_lat, base_lon, radius_km)
+                building_ids = (
+                    set(in_radius)
+                    if building_ids is None
+                    else building_ids & set(in_radius)
+                )
+            stmt = stmt.where(
+                ids_filter(Organization.building_id, sorted(building_ids))
+            )
 
-    if base_lat is not None and base_lon is not None and radius_km is not None:
-        organizations = [
-            org
-            for org in organizations
-            if org.building
-            and calculate_distance(
-                org.building.latitude, org.building.longitude, base_lat, base_lon
+        if city:
+            stmt = stmt.where(
+                Organization.building.has(
+                    Building.address.icontains(city, autoescape=True)
+                )
             )
-            <= radius_km
-        ]
 
-    if city:
-        organizations = [
-            org
-            for org in organizations
-            if org.building and city.lower() in org.building.address.lower()
+        if format_ == "normalized":
+            return await load_normalized_organizations(db, stmt)
+        result = await db.execute(stmt.options(*ORGANIZATION_LOAD_OPTIONS))
+        organizations = result.scalars().all()
+
+        return [
+            OrganizationResponse(**serialize_organization(org)) for org in organizations
         ]
 
-    return [
-        OrganizationResponse(**serialize_organization(org)) for org in organizations
-    ]
+    return await coalesce(request, list_adapter(format_), load)
 
 
 @router.get(
     "/",
-    response_model=list[OrganizationResponse],
+    response_model=list[OrganizationResponse] | NormalizedOrganizationList,
     dependencies=[Depends(verify_api_key)],
     description="Список всех организаций с необязательной фильтрацией по названию, виду деятельности и зданию.",
 )
 async def list_organizations(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     name: str = Query(None),
     activity_id: int = Query(None),
     building_id: int = Query(None),
+    format_: ListFormat = LIST_FORMAT_QUERY,
 ):
-    stmt = select(Organization).options(
-        selectinload(Organization.building),
-        selectinload(Organization.activities)
-        .selectinload(Activity.children)
-        .selectinload(Activity.children),
-    )
-    if name:
-        stmt = stmt.where(Organization.name.ilike(f"%{name}%"))
-    if activity_id:
-        stmt = stmt.join(Organization.activities).where(Activity.id == activity_id)
-    if building_id:
-        stmt = stmt.where(Organization.building_id == building_id)
+    async def load():
+        stmt = select(Organization)
+        if name:
+            stmt = stmt.where(Organization.name.ilike(f"%{name}%"))
+        if activity_id:
+            stmt = stmt.join(Organization.activities).where(Activity.id == activity_id)
+        if building_id:
+            stmt = stmt.where(Organization.building_id == building_id)
 
-    result = await db.execute(stmt)
-    organizations = result.scalars().all()
+        if format_ == "normalized":
+            return await load_normalized_organizations(db, stmt)
+        result = await db.execute(stmt.options(*ORGANIZATION_LOAD_OPTIONS))
+        organizations = result.scalars().all()
+
+        return [
+            OrganizationResponse(**serialize_organization(o)) for o in organizations
+        ]
 
-    return [OrganizationResponse(**serialize_organization(o)) for o in organizations]
+    return await coalesce(request, list_adapter(format_), load)
+
+
+async def check_organization_references(
+    db: AsyncSession, building_id: Optional[int], activity_ids: list[int]
+) -> None:
+    """
+    Проверка здания и видов деятельности по БД — для идентификаторов, которых
+    ещё нет в кэше справочника.
+    """
+    if building_id:
+        exists = await db.scalar(select(Building.id).where(Building.id == building_id))
+        if not exists:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Building with id {building_id} does not exist.",
+            )
+    if activity_ids:
+        found = (
+            await db.scalars(select(Activity.id).where(Activity.id.in_(activity_ids)))
+        ).all()
+        if len(found) != len(activity_ids):
+            raise HTTPException(
+                status_code=400,
+                detail="One or more activities do not exist.",
+            )
 
 
 @router.post(
     "/",
     response_model=OrganizationResponse,
-    dependencies=[Depends(verify_api_key)],
+    dependencies=[Depends(verify_api_key), Depends(require_primary_database)],
     description="Создание новой организации.",
 )
 async def create_organization(
     org_data: OrganizationCreate, db: AsyncSession = Depends(get_db)
 ):
-    async with db.begin():
-        building = None
-        if org_data.building_id:
-            building = await db.scalar(
-                select(Building).where(Building.id == org_data.building_id)
-            )
-            if not building:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Building with id {org_data.building_id} does not exist.",
-                )
+    building_id = org_data.building_id or None
+    activity_ids = org_data.activity_ids
+    if len(set(activity_ids)) != len(activity_ids):
+        raise HTTPException(
+            status_code=400, detail="One or more activities do not exist."
+        )
 
-        activities = []
-        if org_data.activity_ids:
-            result = await db.execute(
-                select(Activity).where(Activity.id.in_(org_data.activity_ids))
+    # Здание и виды деятельности обычно уже есть в кэше справочника: тогда
+    # ссылки проверяются без запросов к БД, а ответ собирается из кэша.
+    # Устаревший кэш на пути записи не перечитывается целиком: ссылки
+    # проверяются индексными запросами, перечитает его следующее чтение.
+    cache = directory_cache
+    cached = (
+        cache.is_fresh()
+        and (building_id is None or building_id in cache.buildings)
+        and all(activity_id in cache.activities for activity_id in activity_ids)
+    )
+    if not cached:
+        await check_organization_references(db, building_id, activity_ids)
+
+    try:
+        organization_id = await db.scalar(
+            insert(Organization)
+            .values(
+                name=org_data.name,
+                phone_numbers=",".join(org_data.phone_numbers)
+                if org_data.phone_numbers
+                else None,
+                building_id=building_id,
             )
-            activities = result.scalars().all()
-            if len(activities) != len(org_data.activity_ids):
-                raise HTTPException(
-                    status_code=400,
-                    detail="One or more activities do not exist.",
+            .returning(Organization.id)
+        )
+        if activity_ids:
+            await db.execute(
+                insert(organization_activities).values(
+                    [
+                        {"organization_id": organization_id, "activity_id": activity_id}
+                        for activity_id in activity_ids
+                    ]
                 )
+            )
+        await db.commit()
+    except IntegrityError:
+        # Здание или вид деятельности удалили между проверкой и вставкой.
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Building or one or more activities do not exist.",
+        )
+    response_cache.invalidate()
 
-        new_org = Organization(
-            name=org_data.name,
-            phone_numbers=",".join(org_data.phone_numbers)
-            if org_data.phone_numbers
-            else None,
-            building=building,
-            activities=activities,
+    if not cached:
+        loaded_org = await db.scalar(
+            select(Organization)
+            .where(Organization.id == organization_id)
+            .options(*ORGANIZATION_LOAD_OPTIONS)
         )
-        db.add(new_org)
-        await db.flush()
-        await db.refresh(new_org)
+        return OrganizationResponse(**serialize_organization(loaded_org))
 
-    stmt = (
+    return OrganizationResponse(
+        id=organization_id,
+        name=org_data.name,
+        phone_numbers=org_data.phone_numbers,
+        building=cache.building(building_id) if building_id else None,
+        activities=[
+            cache.activity_tree(activity_id, depth=ACTIVITY_DEPTH)
+            for activity_id in activity_ids
+        ],
+    )
+
+
+async def load_organizations_batch(
+    ids: list[int], db: AsyncSession
+) -> OrganizationBatchResponse:
+    ids = list(dict.fromkeys(ids))
+    result = await db.execute(
         select(Organization)
-        .where(Organization.id == new_org.id)
-        .options(
-            selectinload(Organization.building),
-            selectinload(Organization.activities)
-            .selectinload(Activity.children)
-            .selectinload(Activity.children),
-        )
+        .where(ids_filter(Organization.id, ids))
+        .options(*ORGANIZATION_LOAD_OPTIONS)
+    )
+    found = {org.id: org for org in result.scalars().all()}
+    return OrganizationBatchResponse(
+        items=[
+            OrganizationResponse(**serialize_organization(found[org_id]))
+            for org_id in ids
+            if org_id in found
+        ],
+        missing=[org_id for org_id in ids if org_id not in found],
     )
-    result = await db.execute(stmt)
-    loaded_org = result.scalars().first()
 
-    if not loaded_org:
-        raise HTTPException(
-            status_code=404, detail="Organization not found after creation"
-        )
 
-    return OrganizationResponse(**serialize_organization(loaded_org))
+@router.get(
+    "/batch",
+    response_model=OrganizationBatchResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Получение организаций по списку идентификаторов (`?ids=1,2,3`) одним запросом к БД.",
+)
+async def get_organizations_batch(
+    ids: list[int] = Depends(batch_ids), db: AsyncSession = Depends(get_db)
+):
+    return await load_organizations_batch(ids, db)
+
+
+@router.post(
+    "/batch",
+    response_model=OrganizationBatchResponse,
+    dependencies=[Depends(verify_api_key)],
+    description="Получение организаций по списку идентификаторов из тела запроса (для больших наборов).",
+)
+async def post_organizations_batch(
+    batch: BatchRequest, db: AsyncSession = Depends(get_db)
+):
+    return await load_organizations_batch(batch.ids, db)
 
 
 @router.get(
@@ -232,12 +415,7 @@ async def get_organization(organization_id: int, db: AsyncSession = Depends(get_
     stmt = (
         select(Organization)
         .where(Organization.id == organization_id)
-        .options(
-            selectinload(Organization.building),
-            selectinload(Organization.activities)
-            .selectinload(Activity.children)
-            .selectinload(Activity.children),
-        )
+        .options(*ORGANIZATION_LOAD_OPTIONS)
     )
     result = await db.execute(stmt)
     org = result.scalars().first()
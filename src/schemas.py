@@ -1,4 +1,5 @@
-from typing import Optional, List
+from datetime import datetime
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field, field_serializer, ConfigDict
 
 
@@ -29,6 +30,29 @@ class BuildingResponse(BuildingBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BuildingCluster(BaseModel):
+    """
+    Кластер зданий в ячейке сетки: центроид, число зданий и организаций.
+    `building_id` заполнен, если в кластере одно здание.
+    """
+
+    latitude: float
+    longitude: float
+    buildings: int
+    organizations: int
+    building_id: Optional[int] = None
+
+
+class BuildingClustersResponse(BaseModel):
+    """
+    Кластеры зданий в bounding box для заданного масштаба карты.
+    """
+
+    zoom: int
+    cell_degrees: float
+    clusters: List[BuildingCluster] = Field(default_factory=list)
+
+
 class ActivityCreate(BaseModel):
     """
     Схема для создания вида деятельности.
@@ -49,6 +73,14 @@ class ActivityResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BatchRequest(BaseModel):
+    """
+    Схема запроса пакетного получения по списку идентификаторов.
+    """
+
+    ids: List[int] = Field(min_length=1, max_length=1000)
+
+
 class OrganizationBase(BaseModel):
     """
     Базовая схема для данных об организации.
@@ -87,3 +119,138 @@ class OrganizationResponse(OrganizationBase):
         if isinstance(value, str):
             return value.split(",")
         return []
+
+
+class NormalizedOrganization(OrganizationBase):
+    """
+    Организация в нормализованном списке: здание и виды деятельности — ссылками.
+    """
+
+    id: int
+    building_id: Optional[int] = None
+    activity_ids: List[int] = Field(default_factory=list)
+
+
+class NormalizedActivity(BaseModel):
+    """
+    Вид деятельности в нормализованном списке; дерево восстанавливается по `parent_id`.
+    """
+
+    id: int
+    name: str
+    parent_id: Optional[int] = None
+
+
+class NormalizedOrganizationList(BaseModel):
+    """
+    Список организаций (`?format=normalized`): каждое здание и вид деятельности
+    входит в ответ один раз — в словари `buildings` и `activities` по id.
+    В `activities` — упомянутые виды деятельности и их потомки на два уровня,
+    как в обычном ответе.
+    """
+
+    organizations: List[NormalizedOrganization] = Field(default_factory=list)
+    buildings: Dict[int, BuildingResponse] = Field(default_factory=dict)
+    activities: Dict[int, NormalizedActivity] = Field(default_factory=dict)
+
+
+class BuildingBatchResponse(BaseModel):
+    """
+    Здания в порядке запрошенных идентификаторов и список ненайденных.
+    """
+
+    items: List[BuildingResponse] = Field(default_factory=list)
+    missing: List[int] = Field(default_factory=list)
+
+
+class ActivityBatchResponse(BaseModel):
+    """
+    Виды деятельности в порядке запрошенных идентификаторов и список ненайденных.
+    """
+
+    items: List[ActivityResponse] = Field(default_factory=list)
+    missing: List[int] = Field(default_factory=list)
+
+
+class OrganizationBatchResponse(BaseModel):
+    """
+    Организации в порядке запрошенных идентификаторов и список ненайденных.
+    """
+
+    items: List[OrganizationResponse] = Field(default_factory=list)
+    missing: List[int] = Field(default_factory=list)
+
+
+class BuildingChange(BuildingResponse):
+    """
+    Схема изменённого здания в ленте изменений.
+    """
+
+    updated_at: datetime
+
+
+class ActivityChange(BaseModel):
+    """
+    Схема изменённого вида деятельности в ленте изменений (плоская, без вложенности).
+    """
+
+    id: int
+    name: str
+    parent_id: Optional[int] = None
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrganizationChange(OrganizationBase):
+    """
+    Схема изменённой организации в ленте изменений (связи передаются идентификаторами).
+    """
+
+    id: int
+    building_id: Optional[int] = None
+    activity_ids: List[int] = Field(default_factory=list)
+    updated_at: datetime
+
+
+class DeletedEntityResponse(BaseModel):
+    """
+    Схема tombstone удалённой записи.
+    """
+
+    entity_type: str
+    entity_id: int
+    deleted_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ChangesResponse(BaseModel):
+    """
+    Страница ленты изменений.
+    `next_token` передаётся в параметр `since` следующего запроса.
+    """
+
+    buildings: List[BuildingChange] = Field(default_factory=list)
+    activities: List[ActivityChange] = Field(default_factory=list)
+    organizations: List[OrganizationChange] = Field(default_factory=list)
+    deleted: List[DeletedEntityResponse] = Field(default_factory=list)
+    next_token: Optional[str] = None
+    has_more: bool = False
+
+
+class JobResponse(BaseModel):
+    """
+    Схема состояния фоновой задачи.
+    `status`: queued, running, succeeded или failed.
+    """
+
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,21 @@
+import uvicorn
+from src.config import settings
+
+
+def run():
+    """
+    Запуск приложения в WORKERS процессах uvicorn.
+    Каждый процесс прогревает свои кэши в lifespan; в офлайн-режиме
+    (SNAPSHOT_PATH) данные снимка разделяются процессами через mmap.
+    """
+    uvicorn.run(
+        "src.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WORKERS,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    run()
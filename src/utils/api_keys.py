@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import select
+
+from src.config import settings
+from src.database import async_session_factory
+from src.models import ApiKey
+from src.utils.notifications import RESYNC_ENTITY
+
+logger = logging.getLogger(__name__)
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+@dataclass
+class TokenBucket:
+    """
+    Token bucket: `rate` токенов в секунду, не более `capacity` в запасе.
+    """
+
+    rate: float
+    capacity: float
+    tokens: float = field(init=False)
+    updated: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self.tokens = self.capacity
+
+    def consume(self) -> float:
+        """
+        Забирает токен. Возвращает 0, если запрос разрешён, иначе — сколько секунд ждать.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class ApiKeyEntry:
+    name: str
+    bucket: Optional[TokenBucket] = None
+
+
+class ApiKeyRegistry:
+    """
+    Реестр API-ключей в памяти процесса: хэш ключа -> квота.
+    Проверка ключа — это SHA-256 и поиск в словаре, без обращения к БД.
+    Реестр перечитывается из таблицы `api_keys` периодически и по событию
+    изменения ключей; статический `settings.API_KEY` действует всегда и без квоты.
+
+    Бакеты живут в памяти процесса, поэтому квота ключа делится поровну между
+    `settings.WORKERS` процессами uvicorn: суммарно ключ получает свою квоту,
+    а не её кратное числу процессов.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, ApiKeyEntry] = self._static_entries()
+        self._task: Optional[asyncio.Task] = None
+        self._pending: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _static_entries() -> dict[str, ApiKeyEntry]:
+        return {hash_api_key(settings.API_KEY): ApiKeyEntry(name="static")}
+
+    def authenticate(self, api_key: str) -> Optional[ApiKeyEntry]:
+        return self._entries.get(hash_api_key(api_key))
+
+    async def refresh(self) -> None:
+        async with async_session_factory() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        ApiKey.name, ApiKey.key_hash, ApiKey.rate_limit, ApiKey.burst
+                    ).where(ApiKey.is_active.is_(True))
+                )
+            ).all()
+
+        entries = self._static_entries()
+        workers = max(settings.WORKERS, 1)
+        for name, key_hash, rate_limit, burst in rows:
+            bucket = None
+            if rate_limit is not None and rate_limit <= 0:
+                # Нулевая квота блокирует ключ, а не снимает ограничение.
+                continue
+            if rate_limit is not None:
+                rate = rate_limit / workers
+                capacity = max(burst / workers, 1)
+                previous = self._entries.get(key_hash)
+                if (
+                    previous
+                    and previous.bucket
+                    and previous.bucket.rate == rate
+                    and previous.bucket.capacity == capacity
+                ):
+                    bucket = previous.bucket
+                else:
+                    bucket = TokenBucket(rate=rate, capacity=capacity)
+            entries[key_hash] = ApiKeyEntry(name=name, bucket=bucket)
+        self._entries = entries
+
+    def handle_change(self, event: dict) -> None:
+        if event.get("entity") in ("api_key", RESYNC_ENTITY):
+            task = asyncio.get_running_loop().create_task(self._safe_refresh())
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _safe_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("API key registry refresh failed")
+
+    async def start(self) -> None:
+        await self._safe_refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.API_KEY_REFRESH_SECONDS)
+            await self._safe_refresh()
+
+
+api_key_registry = ApiKeyRegistry()
+
+
+async def create_api_key(
+    name: str, rate_limit: Optional[float] = None, burst: int = 1
+) -> str:
+    """
+    Создаёт клиентский ключ и возвращает его. В БД сохраняется только хэш.
+
+    Args:
+        name (str): Имя клиента.
+        rate_limit (float): Квота, запросов в секунду (None — без ограничения).
+        burst (int): Допустимый всплеск запросов сверх квоты.
+    """
+    if rate_limit is not None and rate_limit <= 0:
+        raise ValueError("rate_limit must be positive; use None for no limit")
+    if burst < 1:
+        raise ValueError("burst must be at least 1")
+    api_key = secrets.token_urlsafe(32)
+    async with async_session_factory() as session:
+        session.add(
+            ApiKey(
+                name=name,
+                key_hash=hash_api_key(api_key),
+                rate_limit=rate_limit,
+                burst=burst,
+            )
+        )
+        await session.commit()
+    return api_key
+
+
+if __name__ == "__main__":
+    """
+    Точка входа: python src/utils/api_keys.py <name> [--rate 10] [--burst 20]
+    """
+    parser = argparse.ArgumentParser(description="Create client API key")
+    parser.add_argument("name")
+    parser.add_argument("--rate", type=float, default=None)
+    parser.add_argument("--burst", type=int, default=1)
+    args = parser.parse_args()
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive (omit it for no limit)")
+    if args.burst < 1:
+        parser.error("--burst must be at least 1")
+    print(asyncio.run(create_api_key(args.name, args.rate, args.burst)))
@@ -0,0 +1,381 @@
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+from src.config import settings
+
+DEFAULT_PATHS = [
+    "/api/v1/activities/",
+    "/api/v1/buildings/",
+    "/api/v1/organizations/",
+    "/api/v1/organizations/search?min_lat=55&max_lat=56&min_lon=37&max_lon=38",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(
+    port: int, workers: int = 1, env: Optional[dict] = None
+) -> subprocess.Popen:
+    """
+    Запускает приложение в отдельном процессе uvicorn с заданным числом воркеров.
+    """
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env={**os.environ, "PYTHONPATH": os.getcwd(), **(env or {})},
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def wait_ready(base_url: str, path: str, timeout: float = 30.0) -> float:
+    """
+    Ждёт первого успешного ответа и возвращает затраченное время в секундах.
+    """
+    started = time.perf_counter()
+    async with httpx.AsyncClient(
+        base_url=base_url, headers={"X-API-Key": settings.API_KEY}
+    ) as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                response = await client.get(path)
+                if response.status_code < 500:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.01)
+    raise TimeoutError(f"Server at {base_url} did not become ready")
+
+
+async def run_load(
+    base_url: str,
+    paths: list[str],
+    concurrency: int,
+    duration: float,
+    headers: Optional[dict] = None,
+    payloads: Optional[list[Optional[dict]]] = None,
+) -> dict:
+    """
+    Замкнутая нагрузка: `concurrency` клиентов без пауз в течение `duration` секунд.
+    Если для пути задан payload, запрос отправляется как POST с этим JSON.
+    Тело ответа читается без распаковки, поэтому учитывается размер на проводе.
+    """
+    latencies: list[float] = []
+    errors = 0
+    received = 0
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"X-API-Key": settings.API_KEY, **(headers or {})},
+        limits=httpx.Limits(max_connections=concurrency),
+        timeout=30.0,
+    ) as client:
+
+        async def worker(offset: int):
+            nonlocal errors, received
+            request_number = offset
+            while time.perf_counter() < deadline:
+                index = request_number % len(paths)
+                payload = payloads[index] if payloads else None
+                request_number += 1
+                started = time.perf_counter()
+                try:
+                    async with client.stream(
+                        "GET" if payload is None else "POST",
+                        paths[index],
+                        json=payload,
+                    ) as response:
+                        async for chunk in response.aiter_raw():
+                            received += len(chunk)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "bytes_per_request": received / len(latencies) if latencies else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000
+        if latencies
+        else 0.0,
+    }
+
+
+async def benchmark_rps(args) -> None:
+    """
+    Пропускная способность в зависимости от числа воркеров.
+    Генератор нагрузки сам занимает ядро, поэтому для честных цифр его лучше
+    запускать с другой машины через --url.
+    """
+    print(f"cores={os.cpu_count()} concurrency={args.concurrency}")
+    worker_counts = [int(value) for value in args.workers.split(",")]
+    for workers in worker_counts if not args.url else ["external"]:
+        process = None
+        base_url = args.url
+        if not base_url:
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = start_server(port, workers)
+        try:
+            await wait_ready(base_url, args.paths[0])
+            await run_load(base_url, args.paths, args.concurrency, args.warmup)
+            stats = await run_load(
+                base_url, args.paths, args.concurrency, args.duration
+            )
+        finally:
+            if process:
+                stop_server(process)
+        print(
+            f"workers={workers} rps={stats['rps']:.1f} "
+            f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms "
+            f"requests={stats['requests']} errors={stats['errors']}"
+        )
+
+
+async def benchmark_cold_start(args) -> None:
+    """
+    Холодный старт: от запуска процесса до первого успешно обслуженного запроса
+    (импорт приложения, lifespan с прогревом кэшей, первый запрос к БД).
+    """
+    timings = []
+    for run in range(1, args.runs + 1):
+        port = free_port()
+        process = start_server(port, workers=1)
+        try:
+            elapsed = await wait_ready(f"http://127.0.0.1:{port}", args.path)
+        finally:
+            stop_server(process)
+        timings.append(elapsed)
+        print(f"run={run} first_response={elapsed * 1000:.0f}ms")
+    print(
+        f"cold start: min={min(timings) * 1000:.0f}ms "
+        f"median={statistics.median(timings) * 1000:.0f}ms "
+        f"max={max(timings) * 1000:.0f}ms"
+    )
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """
+    Процессорное время (user + system) процесса по /proc; None вне Linux.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rpartition(")")[2].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def fetch_metrics(base_url: str) -> dict:
+    async with httpx.AsyncClient(
+        base_url=base_url, headers={"X-API-Key": settings.API_KEY}
+    ) as client:
+        return (await client.get("/api/v1/metrics/")).json()
+
+
+def compression_cpu_seconds(metrics: dict, encoding: str) -> float:
+    return metrics["compression"]["encodings"].get(encoding, {}).get("cpu_seconds", 0.0)
+
+
+async def benchmark_compression(args) -> None:
+    """
+    Сжатие ответов: для каждой кодировки — RPS, задержка, байты на ответ и
+    процессорное время сервера на запрос (всего и на сжатие; по метрикам
+    процесса, поэтому сервер запускается с одним воркером). С `--no-cache`
+    кэш ответов отключается и каждый ответ сжимается заново.
+    """
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {"RESPONSE_CACHE_TTL_SECONDS": "0"} if args.no_cache else None
+    process = start_server(port, workers=1, env=env)
+    try:
+        await wait_ready(base_url, args.paths[0])
+        for encoding in args.encodings.split(","):
+            headers = {"Accept-Encoding": encoding}
+            await run_load(base_url, args.paths, args.concurrency, args.warmup, headers)
+            before = await fetch_metrics(base_url)
+            cpu_before = process_cpu_seconds(process.pid)
+            stats = await run_load(
+                base_url, args.paths, args.concurrency, args.duration, headers
+            )
+            cpu_after = process_cpu_seconds(process.pid)
+            after = await fetch_metrics(base_url)
+
+            requests = max(stats["requests"], 1)
+            compress_seconds = compression_cpu_seconds(
+                after, encoding
+            ) - compression_cpu_seconds(before, encoding)
+            server_cpu = (
+                f"{(cpu_after - cpu_before) * 1000 / requests:.2f}ms"
+                if cpu_before is not None
+                else "n/a"
+            )
+            print(
+                f"encoding={encoding} rps={stats['rps']:.1f} "
+                f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms "
+                f"bytes/req={stats['bytes_per_request']:.0f} "
+                f"cpu/req={server_cpu} "
+                f"compress_cpu/req={compress_seconds * 1000 / requests:.2f}ms "
+                f"errors={stats['errors']}"
+            )
+    finally:
+        stop_server(process)
+
+
+async def discover_references(base_url: str) -> tuple[int, list[int], int]:
+    """
+    Здание и виды деятельности (первый корень и его потомки), на которые
+    ссылаются создаваемые организации, и родитель создаваемых видов деятельности
+    (последний корень, чтобы новые записи не раздували ответы об организациях).
+    """
+    async with httpx.AsyncClient(
+        base_url=base_url, headers={"X-API-Key": settings.API_KEY}
+    ) as client:
+        buildings = (await client.get("/api/v1/buildings/")).json()
+        activities = (await client.get("/api/v1/activities/")).json()
+    if not buildings or not activities:
+        raise SystemExit("Seed the database first: src/utils/mock_data.py")
+    root = activities[0]
+    return (
+        buildings[0]["id"],
+        [root["id"]] + [child["id"] for child in root["children"][:2]],
+        activities[-1]["id"],
+    )
+
+
+async def benchmark_writes(args) -> None:
+    """
+    Пропускная способность записи: клиенты без пауз попеременно создают виды
+    деятельности и организации. Бенчмарк создаёт записи, поэтому его стоит
+    запускать на одноразовой базе.
+    """
+    process = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = start_server(port, args.workers)
+    try:
+        await wait_ready(base_url, "/api/v1/activities/")
+        building_id, activity_ids, parent_id = await discover_references(base_url)
+        paths = ["/api/v1/activities/", "/api/v1/organizations/"]
+        payloads = [
+            {"name": "Benchmark activity", "parent_id": parent_id},
+            {
+                "name": "Benchmark organization",
+                "phone_numbers": ["8-800-000-00-00"],
+                "building_id": building_id,
+                "activity_ids": activity_ids,
+            },
+        ]
+        for path, payload in zip(paths, payloads):
+            await run_load(
+                base_url, [path], args.concurrency, args.warmup, None, [payload]
+            )
+            stats = await run_load(
+                base_url, [path], args.concurrency, args.duration, None, [payload]
+            )
+            print(
+                f"POST {path} writes/s={stats['rps']:.1f} "
+                f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms "
+                f"requests={stats['requests']} errors={stats['errors']}"
+            )
+    finally:
+        if process:
+            stop_server(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Organization Directory API benchmarks"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rps = subparsers.add_parser("rps", help="RPS scaling by number of workers")
+    rps.add_argument("--workers", default="1,2,4")
+    rps.add_argument("--concurrency", type=int, default=64)
+    rps.add_argument("--duration", type=float, default=10.0)
+    rps.add_argument("--warmup", type=float, default=2.0)
+    rps.add_argument("--url", help="Benchmark an already running server")
+    rps.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    rps.set_defaults(handler=benchmark_rps)
+
+    cold_start = subparsers.add_parser(
+        "cold-start", help="Time from process start to the first served request"
+    )
+    cold_start.add_argument("--runs", type=int, default=5)
+    cold_start.add_argument("--path", default="/api/v1/activities/")
+    cold_start.set_defaults(handler=benchmark_cold_start)
+
+    compression = subparsers.add_parser(
+        "compression", help="Response size and server CPU per request by encoding"
+    )
+    compression.add_argument("--encodings", default="identity,gzip,br,zstd")
+    compression.add_argument("--concurrency", type=int, default=16)
+    compression.add_argument("--duration", type=float, default=10.0)
+    compression.add_argument("--warmup", type=float, default=2.0)
+    compression.add_argument("--no-cache", action="store_true")
+    compression.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    compression.set_defaults(handler=benchmark_compression)
+
+    writes = subparsers.add_parser(
+        "writes", help="Write throughput of create endpoints (creates records)"
+    )
+    writes.add_argument("--workers", type=int, default=1)
+    writes.add_argument("--concurrency", type=int, default=16)
+    writes.add_argument("--duration", type=float, default=10.0)
+    writes.add_argument("--warmup", type=float, default=2.0)
+    writes.add_argument("--url", help="Benchmark an already running server")
+    writes.set_defaults(handler=benchmark_writes)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    """
+    Точка входа: python src/utils/benchmark.py rps --workers 1,2,4
+                 python src/utils/benchmark.py cold-start --runs 5
+                 python src/utils/benchmark.py writes --concurrency 16
+                 python src/utils/benchmark.py compression --no-cache
+    """
+    main()
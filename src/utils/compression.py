@@ -0,0 +1,178 @@
+import gzip
+import time
+from typing import Callable, Optional
+
+from src.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Уровни подобраны для динамических ответов: сжатие занимает единицы
+# миллисекунд на мегабайт JSON при степени сжатия, близкой к максимальной.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# Кодировки в порядке предпочтения сервера; brotli и zstd доступны,
+# если установлены optional-зависимости (`poetry install --extras compression`).
+ENCODERS: dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+if brotli is not None:
+    ENCODERS["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+ENCODERS["gzip"] = lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Выбор кодировки по заголовку Accept-Encoding с учётом q-значений;
+    при равных q побеждает более предпочтительная для сервера.
+    Параметры, кроме q, игнорируются.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value.strip())
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODERS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionStats:
+    """
+    Счётчики сжатия текущего процесса: ответы, байты до и после
+    и процессорное время, потраченное на сжатие.
+    """
+
+    def __init__(self):
+        self.responses: dict[str, int] = {}
+        self.bytes_in: dict[str, int] = {}
+        self.bytes_out: dict[str, int] = {}
+        self.cpu_seconds: dict[str, float] = {}
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        started = time.thread_time()
+        compressed = ENCODERS[encoding](body)
+        self.cpu_seconds[encoding] = (
+            self.cpu_seconds.get(encoding, 0.0) + time.thread_time() - started
+        )
+        self.responses[encoding] = self.responses.get(encoding, 0) + 1
+        self.bytes_in[encoding] = self.bytes_in.get(encoding, 0) + len(body)
+        self.bytes_out[encoding] = self.bytes_out.get(encoding, 0) + len(compressed)
+        return compressed
+
+    def stats(self) -> dict:
+        return {
+            "available": list(ENCODERS),
+            "min_bytes": settings.COMPRESSION_MIN_BYTES,
+            "encodings": {
+                encoding: {
+                    "responses": self.responses[encoding],
+                    "bytes_in": self.bytes_in[encoding],
+                    "bytes_out": self.bytes_out[encoding],
+                    "ratio": self.bytes_out[encoding] / self.bytes_in[encoding],
+                    "cpu_seconds": self.cpu_seconds[encoding],
+                    "cpu_ms_per_response": self.cpu_seconds[encoding]
+                    * 1000
+                    / self.responses[encoding],
+                }
+                for encoding in self.responses
+            },
+        }
+
+
+compression = CompressionStats()
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware: сжимает ответы не меньше `minimum_size` байт в кодировке,
+    согласованной по Accept-Encoding. Решение принимается по заголовкам ответа:
+    потоковые ответы без Content-Length (экспорт, SSE) и ответы, у которых уже
+    есть Content-Encoding (готовые сжатые байты из кэша ответов), передаются
+    как есть и без задержки. Ответы на HEAD не сжимаются: тела у них нет, и
+    Content-Length сжатого пустого тела был бы ложным.
+    """
+
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def should_compress(self, headers: dict[bytes, bytes]) -> bool:
+        return (
+            b"content-encoding" not in headers
+            and headers.get(b"content-type", b"").startswith(COMPRESSIBLE_TYPES)
+            and int(headers.get(b"content-length", 0)) >= self.minimum_size
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = next(
+            (
+                value.decode("latin-1")
+                for name, value in scope["headers"]
+                if name == b"accept-encoding"
+            ),
+            None,
+        )
+        encoding = negotiate(accept_encoding)
+        start_message = None
+        chunks: list[bytes] = []
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if self.should_compress(dict(message.get("headers", []))):
+                    start_message = message
+                else:
+                    await send(message)
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            vary = dict(start_message["headers"]).get(b"vary")
+            headers = [
+                (name, value)
+                for name, value in start_message["headers"]
+                if name not in (b"content-length", b"vary")
+            ]
+            headers.append(
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding")
+            )
+            if encoding is not None:
+                body = compression.compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,341 @@
+import asyncio
+import bisect
+import logging
+import time
+from collections import defaultdict
+from math import asin, cos, degrees, floor, radians, sin
+from typing import Optional
+
+from sqlalchemy import select
+
+from src.config import settings
+from src.database import async_session_factory, ids_filter
+from src.models import Activity, Building
+from src.utils.distance import calculate_distance
+from src.utils.notifications import RESYNC_ENTITY
+
+logger = logging.getLogger(__name__)
+
+GRID_CELL_DEGREES = 0.25
+KM_PER_DEGREE = 111.0
+# Больше накопленных точечных изменений — дешевле перечитать кэш целиком.
+MAX_PENDING_CHANGES = 1000
+CACHED_ENTITIES = ("activity", "building")
+
+
+def grid_cell(latitude: float, longitude: float) -> tuple[int, int]:
+    return floor(latitude / GRID_CELL_DEGREES), floor(longitude / GRID_CELL_DEGREES)
+
+
+class DirectoryCache:
+    """
+    Кэш справочника в памяти процесса: дерево видов деятельности, здания
+    и их сеточный пространственный индекс. Прогревается при старте приложения,
+    обновляется по событиям изменений (LISTEN/NOTIFY): изменённые записи
+    перечитываются по id при следующем обращении, а целиком кэш перечитывается
+    после resync и по истечении `max_age` (секунды, 0 — без ограничения),
+    если событие изменения до процесса не дошло.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.activities: dict[int, tuple[str, Optional[int]]] = {}
+        self.children: dict[Optional[int], list[int]] = {}
+        self.buildings: dict[int, tuple[float, float]] = {}
+        self.addresses: dict[int, str] = {}
+        self.grid: dict[tuple[int, int], list[int]] = {}
+        self._version = 0
+        self._loaded_version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._pending: dict[str, set[int]] = {
+            entity: set() for entity in CACHED_ENTITIES
+        }
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """
+        Полная перезагрузка при следующем обращении.
+        """
+        self._version += 1
+
+    def note_change(self, entity: str, entity_id: int) -> None:
+        """
+        Точечное обновление записи при следующем обращении.
+        """
+        pending = self._pending[entity]
+        pending.add(entity_id)
+        if len(pending) > MAX_PENDING_CHANGES:
+            self.invalidate()
+
+    def handle_change(self, event: dict) -> None:
+        entity = event.get("entity")
+        if entity == RESYNC_ENTITY:
+            self.invalidate()
+        elif entity in CACHED_ENTITIES:
+            if isinstance(event.get("id"), int):
+                self.note_change(entity, event["id"])
+            else:
+                self.invalidate()
+
+    async def warm(self) -> None:
+        """
+        Прогрев при старте. Ошибка не мешает запуску: кэш загрузится при первом запросе.
+        """
+        try:
+            await self.ensure_loaded()
+        except Exception:
+            logger.exception("Directory cache warm-up failed")
+
+    def _needs_reload(self) -> bool:
+        return self._loaded_version != self._version or (
+            self.max_age > 0 and time.monotonic() - self._loaded_at >= self.max_age
+        )
+
+    def is_fresh(self) -> bool:
+        return not self._needs_reload() and not any(self._pending.values())
+
+    async def ensure_loaded(self) -> "DirectoryCache":
+        if self.is_fresh():
+            return self
+        async with self._lock:
+            if self._needs_reload():
+                await self._load()
+            elif any(self._pending.values()):
+                await self._load_pending()
+        return self
+
+    async def _load_pending(self) -> None:
+        pending = self._pending
+        self._pending = {entity: set() for entity in CACHED_ENTITIES}
+        try:
+            async with async_session_factory() as session:
+                if pending["activity"]:
+                    ids = sorted(pending["activity"])
+                    rows = (
+                        await session.execute(
+                            select(
+                                Activity.id, Activity.name, Activity.parent_id
+                            ).where(ids_filter(Activity.id, ids))
+                        )
+                    ).all()
+                    self.apply_activities(ids, rows)
+                if pending["building"]:
+                    ids = sorted(pending["building"])
+                    rows = (
+                        await session.execute(
+                            select(
+                                Building.id,
+                                Building.address,
+                                Building.latitude,
+                                Building.longitude,
+                            ).where(ids_filter(Building.id, ids))
+                        )
+                    ).all()
+                    self.apply_buildings(ids, rows)
+        except BaseException:
+            # Часть изменений могла не примениться: надёжнее перечитать всё.
+            self.invalidate()
+            raise
+
+    def apply_activities(self, ids, rows) -> None:
+        """
+        Применяет перечитанные строки видов деятельности; id из `ids`,
+        которых нет среди строк, удалены.
+        """
+        found = {
+            activity_id: (name, parent_id) for activity_id, name, parent_id in rows
+        }
+        for activity_id in ids:
+            if activity_id in self.activities:
+                old_parent = self.activities[activity_id][1]
+                siblings = self.children.get(old_parent, [])
+                if activity_id in siblings:
+                    siblings.remove(activity_id)
+            if activity_id not in found:
+                self.activities.pop(activity_id, None)
+                continue
+            self.activities[activity_id] = found[activity_id]
+            bisect.insort(
+                self.children.setdefault(found[activity_id][1], []), activity_id
+            )
+
+    def apply_buildings(self, ids, rows) -> None:
+        """
+        Применяет перечитанные строки зданий к словарям и сетке; id из `ids`,
+        которых нет среди строк, удалены.
+        """
+        found = {row[0]: row[1:] for row in rows}
+        for building_id in ids:
+            if building_id in self.buildings:
+                cell = grid_cell(*self.buildings[building_id])
+                self.grid[cell].remove(building_id)
+                if not self.grid[cell]:
+                    del self.grid[cell]
+            if building_id not in found:
+                self.buildings.pop(building_id, None)
+                self.addresses.pop(building_id, None)
+                continue
+            address, latitude, longitude = found[building_id]
+            self.buildings[building_id] = (latitude, longitude)
+            self.addresses[building_id] = address
+            self.grid.setdefault(grid_cell(latitude, longitude), []).append(building_id)
+
+    async def _load(self) -> None:
+        version = self._version
+        loaded_at = time.monotonic()
+        # Изменения, пришедшие до начала загрузки, она и так прочитает.
+        self._pending = {entity: set() for entity in CACHED_ENTITIES}
+        async with async_session_factory() as session:
+            activity_rows = (
+                await session.execute(
+                    select(Activity.id, Activity.name, Activity.parent_id).order_by(
+                        Activity.id
+                    )
+                )
+            ).all()
+            building_rows = (
+                await session.execute(
+                    select(
+                        Building.id,
+                        Building.address,
+                        Building.latitude,
+                        Building.longitude,
+                    )
+                )
+            ).all()
+
+        activities = {}
+        children = defaultdict(list)
+        for activity_id, name, parent_id in activity_rows:
+            activities[activity_id] = (name, parent_id)
+            children[parent_id].append(activity_id)
+
+        buildings = {}
+        addresses = {}
+        grid = defaultdict(list)
+        for building_id, address, latitude, longitude in building_rows:
+            buildings[building_id] = (latitude, longitude)
+            addresses[building_id] = address
+            grid[grid_cell(latitude, longitude)].append(building_id)
+
+        self.activities = activities
+        self.children = dict(children)
+        self.buildings = buildings
+        self.addresses = addresses
+        self.grid = dict(grid)
+        self._loaded_version = version
+        self._loaded_at = loaded_at
+
+    def activity_tree(self, activity_id: int, depth: int) -> Optional[dict]:
+        """
+        Вид деятельности с потомками до глубины `depth` в формате ActivityResponse.
+        """
+        if activity_id not in self.activities:
+            return None
+        return {
+            "id": activity_id,
+            "name": self.activities[activity_id][0],
+            "children": [
+                self.activity_tree(child_id, depth - 1)
+                for child_id in self.children.get(activity_id, [])
+            ]
+            if depth > 0
+            else [],
+        }
+
+    def activity_nodes(self, activity_ids, depth: int) -> dict[int, dict]:
+        """
+        Виды деятельности и их потомки до глубины `depth` плоским словарём
+        {id: NormalizedActivity}; каждый узел — один раз.
+        """
+        nodes = {}
+        level = [
+            activity_id
+            for activity_id in activity_ids
+            if activity_id in self.activities
+        ]
+        for remaining in range(depth, -1, -1):
+            next_level = []
+            for activity_id in level:
+                if activity_id in nodes:
+                    continue
+                name, parent_id = self.activities[activity_id]
+                nodes[activity_id] = {
+                    "id": activity_id,
+                    "name": name,
+                    "parent_id": parent_id,
+                }
+                if remaining:
+                    next_level.extend(self.children.get(activity_id, []))
+            level = next_level
+        return nodes
+
+    def building(self, building_id: int) -> Optional[dict]:
+        """
+        Здание в формате BuildingResponse.
+        """
+        if building_id not in self.buildings:
+            return None
+        latitude, longitude = self.buildings[building_id]
+        return {
+            "id": building_id,
+            "address": self.addresses[building_id],
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+
+    def buildings_in_bbox(
+        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float
+    ) -> list[int]:
+        (min_row, min_col), (max_row, max_col) = (
+            grid_cell(min_lat, min_lon),
+            grid_cell(max_lat, max_lon),
+        )
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.grid):
+            cells = [
+                cell
+                for cell in self.grid
+                if min_row <= cell[0] <= max_row and min_col <= cell[1] <= max_col
+            ]
+        else:
+            cells = [
+                (row, col)
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+            ]
+        return [
+            building_id
+            for cell in cells
+            for building_id in self.grid.get(cell, [])
+            if min_lat <= self.buildings[building_id][0] <= max_lat
+            and min_lon <= self.buildings[building_id][1] <= max_lon
+        ]
+
+    def buildings_within_radius(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> list[int]:
+        lat_delta = radius_km / KM_PER_DEGREE
+        if abs(latitude) + lat_delta > 89.0:
+            lon_delta = 180.0
+        else:
+            # Наибольшее отклонение окружности по долготе — asin(sin r / cos φ);
+            # r / cos φ на высоких широтах заметно уже и теряет здания.
+            lon_delta = degrees(asin(sin(radians(lat_delta)) / cos(radians(latitude))))
+        if abs(longitude) + lon_delta > 180.0 or abs(latitude) + lat_delta > 89.0:
+            candidates = list(self.buildings)
+        else:
+            candidates = self.buildings_in_bbox(
+                latitude - lat_delta,
+                latitude + lat_delta,
+                longitude - lon_delta,
+                longitude + lon_delta,
+            )
+        return [
+            building_id
+            for building_id in candidates
+            if calculate_distance(*self.buildings[building_id], latitude, longitude)
+            <= radius_km
+        ]
+
+
+directory_cache = DirectoryCache(max_age=settings.DIRECTORY_CACHE_MAX_AGE_SECONDS)
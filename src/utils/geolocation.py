@@ -1,23 +1,60 @@
-import httpx
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
 
 NOMINATIM_API_URL = "https://nominatim.openstreetmap.org/search"
 
+_client: Optional["httpx.AsyncClient"] = None
+
+
+class GeocodingError(Exception):
+    """
+    Геокодер недоступен или ответил ошибкой (таймаут, 429, 5xx): запрос можно
+    повторить позже. Пустой ответ геокодера ошибкой не считается.
+    """
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """
+    Общий HTTP-клиент геокодера с пулом соединений. Создаётся при первом
+    геокодировании, поэтому импорт httpx и загрузка SSL-сертификатов (~0.2 с)
+    не входят в холодный старт; закрывается в lifespan приложения.
+    """
+    global _client
+    if _client is None:
+        import httpx
+
+        _client = httpx.AsyncClient()
+    return _client
+
+
+async def stop_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def get_coordinates_from_city(city: str) -> Optional[Tuple[float, float]]:
     """
     Получение координат (широты и долготы) для указанного города через Nominatim API.
+    Возвращает None, если адрес не найден; при сбое геокодера — GeocodingError.
     """
+    import httpx
+
     params = {
         "q": city,
         "format": "json",
         "limit": 1,
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(NOMINATIM_API_URL, params=params)
-        if response.status_code == 200 and response.json():
-            data = response.json()[0]
-            latitude = float(data["lat"])
-            longitude = float(data["lon"])
-            return latitude, longitude
-    return None
+    try:
+        response = await get_http_client().get(NOMINATIM_API_URL, params=params)
+    except httpx.HTTPError as exc:
+        raise GeocodingError(f"Nominatim request failed: {exc!r}") from exc
+    if response.status_code != 200:
+        raise GeocodingError(f"Nominatim responded with {response.status_code}")
+    results = response.json()
+    if not results:
+        return None
+    return float(results[0]["lat"]), float(results[0]["lon"])
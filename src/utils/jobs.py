@@ -0,0 +1,272 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import and_, or_, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.database import async_session_factory
+from src.models import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[Optional[dict]]]
+
+
+class PermanentJobError(Exception):
+    """
+    Ошибка, которую бессмысленно повторять: задача сразу помечается как failed.
+    """
+
+
+class JobQueue:
+    """
+    Очередь фоновых задач поверх таблицы `jobs`.
+
+    Задачи хранятся в Postgres и переживают перезапуски. Воркеры (не больше
+    `concurrency` на процесс) забирают задачи через `FOR UPDATE SKIP LOCKED`,
+    поэтому несколько процессов uvicorn не выполняют одну задачу дважды.
+    Забранная задача арендуется до `locked_until`: если процесс упал, после
+    истечения аренды задачу заберёт другой воркер.
+
+    Обработчик получает сессию и payload; его изменения в БД фиксируются в одной
+    транзакции с отметкой об успешном выполнении. Отметка (как и перевод в
+    повтор или failed) ставится, только если задача всё ещё арендована этой
+    попыткой (`attempts` не изменился): если аренда истекла и задачу забрал
+    другой воркер, изменения опоздавшей попытки откатываются, поэтому
+    обработчик фиксирует свои изменения не больше одного раза. Упавшая задача
+    повторяется с экспоненциальной задержкой, пока не исчерпает `max_attempts`.
+    `after_commit` обработчика вызывается с результатом после коммита.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._handlers: dict[str, JobHandler] = {}
+        self._after_commit: dict[str, Callable[[Optional[dict]], None]] = {}
+        self._workers: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.lost_leases = 0
+
+    def handler(
+        self,
+        kind: str,
+        after_commit: Optional[Callable[[Optional[dict]], None]] = None,
+    ) -> Callable[[JobHandler], JobHandler]:
+        def register(fn: JobHandler) -> JobHandler:
+            self._handlers[kind] = fn
+            if after_commit is not None:
+                self._after_commit[kind] = after_commit
+            return fn
+
+        return register
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        kind: str,
+        payload: dict,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(
+            kind=kind,
+            payload=payload,
+            status="queued",
+            attempts=0,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        self._wakeup.set()
+        return job
+
+    async def start(self) -> None:
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._work_forever())
+                for _ in range(self.concurrency)
+            ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "lost_leases": self.lost_leases,
+        }
+
+    def backoff(self, attempts: int) -> float:
+        return min(
+            settings.JOB_MAX_BACKOFF_SECONDS,
+            settings.JOB_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        )
+
+    async def _work_forever(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Job claim failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), settings.JOB_POLL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._run(job)
+
+    async def _claim(self) -> Optional[Any]:
+        now = func.now()
+        candidate = (
+            select(Job.id)
+            .where(
+                or_(
+                    and_(Job.status == "queued", Job.run_after <= now),
+                    and_(Job.status == "running", Job.locked_until < now),
+                )
+            )
+            .order_by(Job.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with async_session_factory() as session:
+            job = (
+                await session.execute(
+                    update(Job)
+                    .where(Job.id == candidate)
+                    .values(
+                        status="running",
+                        attempts=Job.attempts + 1,
+                        locked_until=now
+                        + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    )
+                    .returning(
+                        Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts
+                    )
+                )
+            ).first()
+            await session.commit()
+        return job
+
+    async def _run(self, job) -> None:
+        self.running += 1
+        try:
+            async with async_session_factory() as session:
+                try:
+                    if job.attempts > job.max_attempts:
+                        raise PermanentJobError("Lease expired on the last attempt")
+                    handler = self._handlers.get(job.kind)
+                    if handler is None:
+                        raise PermanentJobError(f"Unknown job kind: {job.kind}")
+                    result = await handler(session, job.payload)
+                    completed = await session.execute(
+                        update(Job)
+                        .where(self._leased(job))
+                        .values(
+                            status="succeeded",
+                            result=result,
+                            last_error=None,
+                            locked_until=None,
+                        )
+                    )
+                    if completed.rowcount == 0:
+                        await session.rollback()
+                        self.lost_leases += 1
+                        logger.warning(
+                            "Job %s (%s) attempt %s lost its lease, discarded",
+                            job.id,
+                            job.kind,
+                            job.attempts,
+                        )
+                        return
+                    await session.commit()
+                    self.succeeded += 1
+                    after_commit = self._after_commit.get(job.kind)
+                    if after_commit is not None:
+                        try:
+                            after_commit(result)
+                        except Exception:
+                            logger.exception("Job %s after-commit hook failed", job.id)
+                except asyncio.CancelledError:
+                    await session.rollback()
+                    await self._release(job)
+                    raise
+                except Exception as exc:
+                    await session.rollback()
+                    await self._fail(job, exc)
+        finally:
+            self.running -= 1
+
+    @staticmethod
+    def _leased(job):
+        """
+        Условие «задача всё ещё арендована этой попыткой».
+        """
+        return and_(
+            Job.id == job.id, Job.status == "running", Job.attempts == job.attempts
+        )
+
+    async def _release(self, job) -> None:
+        """
+        Возвращает задачу в очередь при остановке приложения, не дожидаясь аренды.
+        """
+        async with async_session_factory() as session:
+            await session.execute(
+                update(Job)
+                .where(self._leased(job))
+                .values(status="queued", locked_until=None)
+            )
+            await session.commit()
+
+    async def _fail(self, job, exc: Exception) -> None:
+        permanent = (
+            isinstance(exc, PermanentJobError) or job.attempts >= job.max_attempts
+        )
+        if permanent:
+            logger.error("Job %s (%s) failed: %s", job.id, job.kind, exc)
+            values = {"status": "failed"}
+            self.failed += 1
+        else:
+            logger.warning(
+                "Job %s (%s) attempt %s failed, retrying: %s",
+                job.id,
+                job.kind,
+                job.attempts,
+                exc,
+            )
+            values = {
+                "status": "queued",
+                "run_after": func.now() + timedelta(seconds=self.backoff(job.attempts)),
+            }
+            self.retried += 1
+        async with async_session_factory() as session:
+            await session.execute(
+                update(Job)
+                .where(self._leased(job))
+                .values(last_error=repr(exc), locked_until=None, **values)
+            )
+            await session.commit()
+
+
+job_queue = JobQueue(concurrency=settings.JOB_WORKERS)
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "directory_changes"
+RECONNECT_DELAY_SECONDS = 5
+SUBSCRIBER_QUEUE_SIZE = 100
+# Публикуется после каждого (пере)подключения слушателя (уведомления, пришедшие,
+# пока соединения не было, потеряны, и кэши процесса нужно перечитать) и вместо
+# событий, вытесненных из переполненной очереди подписчика.
+RESYNC_ENTITY = "resync"
+
+
+class ChangeBroadcaster:
+    """
+    Единственный на процесс слушатель канала Postgres `LISTEN directory_changes`.
+    События публикуются триггерами БД при вставке, изменении и удалении зданий,
+    видов деятельности и организаций, и раздаются подписчикам (SSE-клиентам)
+    и зарегистрированным колбэкам (например, для инвалидации кэшей).
+    После каждого подключения публикуется событие `{"entity": "resync"}`.
+    """
+
+    def __init__(self, channel: str = CHANNEL):
+        self.channel = channel
+        self._subscribers: set[asyncio.Queue] = set()
+        self._callbacks: list[Callable[[dict], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_callback(self, callback: Callable[[dict], None]) -> None:
+        self._callbacks.append(callback)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def publish(self, event: dict) -> None:
+        """
+        Раздаёт событие всем подписчикам в текущем процессе.
+        Медленный подписчик не блокирует остальных: его переполненная очередь
+        заменяется одним событием resync, по которому клиент перечитывает ленту.
+        """
+        for callback in self._callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Change callback failed for %s", event)
+        for queue in self._subscribers:
+            if queue.full():
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"entity": RESYNC_ENTITY})
+            queue.put_nowait(event)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Malformed change notification: %r", payload)
+            return
+        self.publish(event)
+
+    async def _listen_forever(self) -> None:
+        import asyncpg
+
+        dsn = settings.DATABASE_URL.replace("postgresql+asyncpg", "postgresql")
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                self.publish({"entity": RESYNC_ENTITY})
+                await closed.wait()
+                logger.warning("LISTEN connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN connection failed, retrying")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+
+broadcaster = ChangeBroadcaster()
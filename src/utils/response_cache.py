@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Request, Response
+
+from src.config import settings
+from src.utils.compression import compression, negotiate
+
+
+class CachedPayload:
+    """
+    Сериализованный ответ и его сжатые варианты: каждая кодировка
+    сжимается один раз, при первом запросе с ней.
+    """
+
+    def __init__(self, body: bytes, expires_at: float):
+        self.body = body
+        self.expires_at = expires_at
+        self.encoded: dict[str, bytes] = {}
+
+    def encode(self, encoding: str) -> bytes:
+        if encoding not in self.encoded:
+            self.encoded[encoding] = compression.compress(self.body, encoding)
+        return self.encoded[encoding]
+
+
+class ResponseCache:
+    """
+    LRU-кэш сериализованных ответов списочных эндпоинтов по ключу запроса.
+
+    Сбрасывается целиком по любому событию изменения справочника (LISTEN/NOTIFY)
+    и при записи в текущем процессе; `ttl` ограничивает устаревание, если
+    событие потерялось при переподключении слушателя. Ответ, загрузка которого
+    началась до сброса, в кэш не попадает.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedPayload] = OrderedDict()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._entries.clear()
+
+    def handle_change(self, event: dict) -> None:
+        self.invalidate()
+
+    def get(self, key: str) -> Optional[CachedPayload]:
+        payload = self._entries.get(key)
+        if payload is None or payload.expires_at < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, key: str, body: bytes, version: int) -> CachedPayload:
+        payload = CachedPayload(body, time.monotonic() + self.ttl)
+        if version == self.version and self.ttl > 0:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+response_cache = ResponseCache(
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+)
+
+
+def cached_response(request: Request, payload: CachedPayload) -> Response:
+    """
+    Ответ из кэша в согласованной с клиентом кодировке: сжатые байты берутся
+    из кэша, и middleware сжатия их уже не трогает.
+    """
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding is None or len(payload.body) < settings.COMPRESSION_MIN_BYTES:
+        return Response(content=payload.body, media_type="application/json")
+    return Response(
+        content=payload.encode(encoding),
+        media_type="application/json",
+        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+    )
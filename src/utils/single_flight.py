@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from src.config import settings
+from src.utils.response_cache import cached_response, response_cache
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных запросов: пока по ключу выполняется
+    запрос-лидер, остальные ждут его результат не дольше `wait_timeout` секунд,
+    а затем выполняют запрос сами. Ошибка лидера (например, HTTPException)
+    передаётся ожидающим; отменённый лидер не роняет ожидающих.
+    """
+
+    def __init__(self, wait_timeout: float):
+        self.wait_timeout = wait_timeout
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            self.followers += 1
+            await asyncio.wait({future}, timeout=self.wait_timeout)
+            if future.done() and not future.cancelled():
+                return future.result()
+            self.timeouts += 1
+            return await fn()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "timeouts": self.timeouts,
+            "coalescing_rate": self.followers / total if total else 0.0,
+        }
+
+
+single_flight = SingleFlight(wait_timeout=settings.SINGLE_FLIGHT_WAIT_SECONDS)
+
+
+def request_key(request: Request) -> str:
+    """
+    Нормализованный ключ запроса: путь и отсортированные параметры строки запроса.
+    """
+    params = "&".join(
+        f"{name}={value}" for name, value in sorted(request.query_params.multi_items())
+    )
+    return f"{request.url.path}?{params}"
+
+
+async def coalesce(
+    request: Request, adapter: TypeAdapter, load: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Выполняет `load` один раз на группу одинаковых одновременных запросов
+    и отдаёт всем участникам одни и те же сериализованные байты. Байты и их
+    сжатые варианты сохраняются в кэше ответов до ближайшего изменения данных.
+
+    Версия кэша читается в начале загрузки и возвращается вместе с байтами:
+    участник, пришедший после сброса кэша и присоединившийся к загрузке,
+    начатой до него, сохраняет ответ под старой версией, то есть не сохраняет.
+    """
+
+    async def render() -> tuple[int, bytes]:
+        version = response_cache.version
+        return version, adapter.dump_json(await load())
+
+    key = request_key(request)
+    payload = response_cache.get(key)
+    if payload is None:
+        version, body = await single_flight.do(key, render)
+        payload = response_cache.put(key, body, version)
+    return cached_response(request, payload)
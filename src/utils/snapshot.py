@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import os
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config import settings
+from src.database import Base
+from src.models import ApiKey
+
+SNAPSHOT_TABLES = [
+    "buildings",
+    "activities",
+    "organizations",
+    "organization_activities",
+    "deleted_entities",
+    "api_keys",
+]
+# В снимок попадают только активные ключи (хэши и квоты): офлайн-узел
+# проверяет клиентские ключи так же, как основной.
+SNAPSHOT_FILTERS = {
+    "api_keys": ApiKey.is_active.is_(True),
+}
+BATCH_SIZE = 5000
+
+# Дополнительные индексы снимка (индексы внешних ключей создаются из моделей):
+# поиск по имени и пространственный индекс по координатам для bounding box.
+SNAPSHOT_INDEXES = [
+    "CREATE INDEX ix_snapshot_organizations_name ON organizations (name)",
+    "CREATE INDEX ix_snapshot_buildings_coordinates ON buildings (latitude, longitude)",
+]
+
+
+async def build_snapshot(path: str):
+    """
+    Копирует справочник из Postgres в файл SQLite для офлайн-режима (SNAPSHOT_PATH).
+    Файл собирается во временном файле и атомарно подменяет существующий снимок.
+
+    Args:
+        path (str): Путь к итоговому файлу снимка.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    tables = [Base.metadata.tables[name] for name in SNAPSHOT_TABLES]
+    source = create_async_engine(settings.DATABASE_URL)
+    target = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}")
+    try:
+        async with target.begin() as target_conn:
+            await target_conn.run_sync(Base.metadata.create_all, tables=tables)
+            async with source.connect() as source_conn:
+                for table in tables:
+                    query = select(table)
+                    if table.name in SNAPSHOT_FILTERS:
+                        query = query.where(SNAPSHOT_FILTERS[table.name])
+                    result = await source_conn.stream(query)
+                    async for rows in result.mappings().partitions(BATCH_SIZE):
+                        await target_conn.execute(insert(table), list(rows))
+            for ddl in SNAPSHOT_INDEXES:
+                await target_conn.exec_driver_sql(ddl)
+            await target_conn.exec_driver_sql("ANALYZE")
+        async with target.connect() as target_conn:
+            await target_conn.exec_driver_sql("VACUUM")
+    finally:
+        await source.dispose()
+        await target.dispose()
+
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    """
+    Точка входа для сборки офлайн-снимка: python src/utils/snapshot.py <path>
+    """
+    parser = argparse.ArgumentParser(description="Build offline SQLite snapshot")
+    parser.add_argument("path", nargs="?", default="snapshot.sqlite3")
+    asyncio.run(build_snapshot(parser.parse_args().path))
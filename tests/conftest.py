@@ -0,0 +1,12 @@
+"""
+Настройки приложения читаются из окружения при первом импорте `src.config`,
+а модули тестов импортируют `src` при сборе. Поэтому тестовая БД подставляется
+здесь, до сбора любого модуля, а не в отдельных тестах.
+"""
+
+import os
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ["SNAPSHOT_PATH"] = ""
@@ -0,0 +1,109 @@
+"""
+Курсор ленты изменений: порядок (timestamp, rank, id) при совпадающих
+метках времени у разных сущностей и разбор токена `since`.
+"""
+
+from datetime import datetime, timedelta
+from itertools import product
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    Table,
+    create_engine,
+    select,
+)
+
+from src.routers.v1.changes import (
+    ACTIVITY_RANK,
+    BUILDING_RANK,
+    DELETED_RANK,
+    ORGANIZATION_RANK,
+    after_cursor,
+    decode_token,
+    encode_token,
+)
+
+RANKS = [BUILDING_RANK, ACTIVITY_RANK, ORGANIZATION_RANK, DELETED_RANK]
+BASE = datetime(2026, 10, 18, 12, 0, 0)
+# Две метки времени на все сущности: внутри метки порядок решают rank и id.
+STAMPS = [BASE, BASE + timedelta(microseconds=1)]
+IDS = [1, 2, 3]
+
+
+@pytest.fixture(scope="module")
+def tables():
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    tables = {
+        rank: Table(
+            f"entity_{rank}",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("ts", DateTime, nullable=False),
+        )
+        for rank in RANKS
+    }
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        for rank, table in tables.items():
+            conn.execute(
+                table.insert(),
+                [{"id": entity_id, "ts": STAMPS[entity_id % 2]} for entity_id in IDS],
+            )
+    yield engine, tables
+    engine.dispose()
+
+
+def all_changes() -> list[tuple[datetime, int, int]]:
+    return sorted(
+        (STAMPS[entity_id % 2], rank, entity_id)
+        for rank, entity_id in product(RANKS, IDS)
+    )
+
+
+@pytest.mark.parametrize("cursor", [None, *all_changes()])
+def test_after_cursor_orders_ties_by_rank_then_id(tables, cursor):
+    engine, by_rank = tables
+    found = []
+    with engine.connect() as conn:
+        for rank, table in by_rank.items():
+            rows = conn.execute(
+                select(table.c.ts, table.c.id).where(
+                    after_cursor(table.c.ts, table.c.id, rank, cursor)
+                )
+            ).all()
+            found += [(ts, rank, entity_id) for ts, entity_id in rows]
+    expected = [change for change in all_changes() if cursor is None or change > cursor]
+    assert sorted(found) == expected
+
+
+def test_after_cursor_respects_horizon(tables):
+    engine, by_rank = tables
+    table = by_rank[ORGANIZATION_RANK]
+    with engine.connect() as conn:
+        ids = conn.scalars(
+            select(table.c.id).where(
+                after_cursor(table.c.ts, table.c.id, ORGANIZATION_RANK, None, STAMPS[1])
+            )
+        ).all()
+    assert sorted(ids) == [entity_id for entity_id in IDS if entity_id % 2 == 0]
+
+
+def test_token_round_trip():
+    token = encode_token(STAMPS[1], ACTIVITY_RANK, 42)
+    assert decode_token(token) == (STAMPS[1], ACTIVITY_RANK, 42)
+
+
+@pytest.mark.parametrize(
+    "token",
+    ["", "not base64!", "bm90LWEtdG9rZW4", "MjAyNi0xMC0xOHwxfGE"],
+)
+def test_malformed_token_is_rejected(token):
+    with pytest.raises(HTTPException) as error:
+        decode_token(token)
+    assert error.value.status_code == 400
@@ -0,0 +1,127 @@
+"""
+Согласование кодировки по Accept-Encoding и сжатие ответов `CompressionMiddleware`.
+"""
+
+import asyncio
+import gzip
+
+import pytest
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from src.utils.compression import ENCODERS, CompressionMiddleware, negotiate
+
+MINIMUM_SIZE = 100
+BODY = {"items": ["организация"] * 50}
+
+needs_brotli = pytest.mark.skipif("br" not in ENCODERS, reason="brotli not installed")
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("GZIP ; Q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("gzip;q=abc", None),
+        ("*;q=0, gzip;q=0.1", "gzip"),
+        ("gzip;x=1;q=0.5", "gzip"),
+    ],
+)
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+@needs_brotli
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("br;q=1.0;x=1", "br"),
+        ("gzip, br", "br"),
+        ("gzip;q=1, br;q=0.5", "gzip"),
+        ("gzip;q=0.5, br;q=0.8", "br"),
+    ],
+)
+def test_negotiate_brotli(header, expected):
+    assert negotiate(header) == expected
+
+
+def call(response, method: str = "GET", accept_encoding: str = "gzip"):
+    """
+    Прогоняет ответ через middleware и возвращает (заголовки, тело).
+    """
+    middleware = CompressionMiddleware(response, minimum_size=MINIMUM_SIZE)
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        # После тела запроса клиент молчит, пока не получит ответ.
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    start, *bodies = messages
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    return headers, b"".join(message.get("body", b"") for message in bodies)
+
+
+def test_large_json_is_compressed():
+    response = JSONResponse(BODY)
+    headers, body = call(response)
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body)
+    assert gzip.decompress(body) == response.body
+
+
+def test_small_response_is_not_compressed():
+    headers, body = call(JSONResponse({"id": 1}))
+    assert "content-encoding" not in headers
+    assert body == b'{"id":1}'
+
+
+def test_uncompressible_type_is_passed_through():
+    headers, body = call(
+        PlainTextResponse("x" * 1000, media_type="application/octet-stream")
+    )
+    assert "content-encoding" not in headers
+    assert body == b"x" * 1000
+
+
+def test_without_accepted_encoding_body_is_identity_but_varies():
+    response = JSONResponse(BODY)
+    headers, body = call(response, accept_encoding="identity")
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert body == response.body
+
+
+def test_streaming_response_is_passed_through():
+    async def chunks():
+        yield b"[" + b"1," * 500
+        yield b"1]"
+
+    headers, body = call(StreamingResponse(chunks(), media_type="application/json"))
+    assert "content-encoding" not in headers
+    assert body == b"[" + b"1," * 500 + b"1]"
+
+
+def test_head_response_is_not_compressed():
+    response = JSONResponse(BODY)
+    # Тело ответа на HEAD отбрасывает сервер; заголовки описывают несжатый ответ.
+    headers, _ = call(response, method="HEAD")
+    assert "content-encoding" not in headers
+    assert headers["content-length"] == str(len(response.body))
@@ -0,0 +1,145 @@
+"""
+Сеточный пространственный индекс кэша справочника против полного перебора:
+поиск по bbox и радиусу должен находить ровно те же здания, что и проверка
+каждого здания, на любых широтах, у полюсов и у антимеридиана.
+"""
+
+import random
+from math import cos, radians
+
+import pytest
+
+from src.utils.directory_cache import KM_PER_DEGREE, DirectoryCache, grid_cell
+from src.utils.distance import calculate_distance
+
+LAT_STEP = 0.5
+LON_STEP = 1.0
+RANDOM_POINTS = 20000
+
+
+def make_cache(points) -> DirectoryCache:
+    cache = DirectoryCache(max_age=0)
+    for building_id, (latitude, longitude) in enumerate(points, start=1):
+        cache.buildings[building_id] = (latitude, longitude)
+        cache.grid.setdefault(grid_cell(latitude, longitude), []).append(building_id)
+    return cache
+
+
+@pytest.fixture(scope="module")
+def cache() -> DirectoryCache:
+    return make_cache(
+        (-89.0 + row * LAT_STEP, -180.0 + col * LON_STEP)
+        for row in range(int(178 / LAT_STEP) + 1)
+        for col in range(int(360 / LON_STEP))
+    )
+
+
+def points_around(latitude: float, longitude: float, radius_km: float):
+    """
+    Случайные точки, плотно покрывающие окрестность круга с запасом:
+    граница круга на крайних долготах попадает между узлами любой сетки.
+    """
+    rng = random.Random(f"{latitude},{longitude},{radius_km}")
+    lat_delta = 1.5 * radius_km / KM_PER_DEGREE
+    lon_delta = min(
+        180.0,
+        3 * lat_delta / max(cos(radians(min(abs(latitude) + lat_delta, 89.9))), 1e-3),
+    )
+    for _ in range(RANDOM_POINTS):
+        point_lat = min(
+            89.9, max(-89.9, rng.uniform(latitude - lat_delta, latitude + lat_delta))
+        )
+        point_lon = (
+            rng.uniform(longitude - lon_delta, longitude + lon_delta) + 180.0
+        ) % 360.0 - 180.0
+        yield point_lat, point_lon
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius_km",
+    [
+        (55.75, 37.62, 5),
+        (0.0, 0.0, 500),
+        (60.0, 30.0, 1000),
+        (60.1, 30.1, 1000),
+        (70.0, 100.1, 1500),
+        (-45.0, -170.0, 2000),
+        (75.0, 179.5, 300),
+        (85.0, 0.0, 600),
+    ],
+)
+def test_radius_matches_brute_force(latitude, longitude, radius_km):
+    cache = make_cache(points_around(latitude, longitude, radius_km))
+    expected = {
+        building_id
+        for building_id, coords in cache.buildings.items()
+        if calculate_distance(*coords, latitude, longitude) <= radius_km
+    }
+    found = cache.buildings_within_radius(latitude, longitude, radius_km)
+    assert len(found) == len(set(found))
+    assert set(found) == expected, (
+        f"missing {len(expected - set(found))}, extra {len(set(found) - expected)}"
+    )
+
+
+@pytest.mark.parametrize(
+    "min_lat, max_lat, min_lon, max_lon",
+    [
+        (55.0, 56.0, 37.0, 38.0),
+        (-10.3, 10.7, -20.2, 30.9),
+        (-89.0, 89.0, -180.0, 180.0),
+    ],
+)
+def test_bbox_matches_brute_force(cache, min_lat, max_lat, min_lon, max_lon):
+    expected = {
+        building_id
+        for building_id, (latitude, longitude) in cache.buildings.items()
+        if min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+    }
+    found = cache.buildings_in_bbox(min_lat, max_lat, min_lon, max_lon)
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+
+def test_apply_buildings_moves_adds_and_removes_in_grid():
+    cache = make_cache([(55.75, 37.62), (59.93, 30.31), (55.76, 37.63)])
+    cache.addresses = {1: "a", 2: "b", 3: "c"}
+    cache.apply_buildings(
+        [1, 2, 4],
+        [(1, "a2", 10.0, 20.0), (4, "d", 55.75, 37.62)],
+    )
+    assert cache.buildings == {1: (10.0, 20.0), 3: (55.76, 37.63), 4: (55.75, 37.62)}
+    assert cache.addresses == {1: "a2", 3: "c", 4: "d"}
+    assert sorted(cache.buildings_in_bbox(55.0, 56.0, 37.0, 38.0)) == [3, 4]
+    assert cache.buildings_in_bbox(59.0, 60.0, 30.0, 31.0) == []
+    assert cache.buildings_in_bbox(9.0, 11.0, 19.0, 21.0) == [1]
+    assert all(cache.grid.values())
+
+
+def test_apply_activities_reparents_and_removes():
+    cache = DirectoryCache(max_age=0)
+    cache.activities = {1: ("Еда", None), 2: ("Мясо", 1), 3: ("Молоко", 1)}
+    cache.children = {None: [1], 1: [2, 3]}
+    cache.apply_activities(
+        [2, 3, 4],
+        [(3, "Молочка", None), (4, "Сыр", 1)],
+    )
+    assert cache.activities == {1: ("Еда", None), 3: ("Молочка", None), 4: ("Сыр", 1)}
+    assert cache.children == {None: [1, 3], 1: [4]}
+    assert cache.activity_tree(1, depth=2) == {
+        "id": 1,
+        "name": "Еда",
+        "children": [{"id": 4, "name": "Сыр", "children": []}],
+    }
+
+
+def test_change_events_mark_records_instead_of_reloading():
+    cache = DirectoryCache(max_age=0)
+    cache._loaded_version = cache._version
+    cache.handle_change({"entity": "building", "id": 7, "op": "update"})
+    cache.handle_change({"entity": "organization", "id": 1, "op": "update"})
+    assert not cache._needs_reload()
+    assert cache._pending == {"activity": set(), "building": {7}}
+    assert not cache.is_fresh()
+    cache.handle_change({"entity": "resync"})
+    assert cache._needs_reload()
@@ -0,0 +1,106 @@
+"""
+Импорт приложения и CLI-утилит не должен тянуть тяжёлые зависимости.
+
+Каждый модуль импортируется в чистом процессе; тест проверяет по `sys.modules`,
+что зависимости, которые нужны только во время работы (драйвер БД,
+HTTP-клиент), не загружаются при импорте. Движок БД и HTTP-клиент создаются
+в lifespan.
+
+Бюджет времени импорта (`python -X importtime`) зависит от машины, поэтому
+проверяется только по запросу: `IMPORT_BUDGETS=1`; на медленной машине бюджеты
+растягиваются переменной `IMPORT_BUDGET_SCALE` (например, `IMPORT_BUDGET_SCALE=2`).
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+RUNS = 3
+CHECK_BUDGETS = os.getenv("IMPORT_BUDGETS") == "1"
+BUDGET_SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", 1))
+
+# Модуль -> бюджет суммарного времени импорта, мс.
+IMPORT_BUDGETS_MS = {
+    "src.main": 1500,
+    "src.models": 1000,
+    "src.utils.mock_data": 1000,
+}
+
+# Зависимости, которые не должны загружаться при импорте модуля.
+LAZY_DEPENDENCIES = {
+    "src.main": ["asyncpg", "httpx", "sqlalchemy.dialects.postgresql"],
+    "src.models": ["asyncpg", "httpx", "fastapi", "sqlalchemy.dialects.postgresql"],
+    "src.utils.mock_data": ["asyncpg", "httpx", "fastapi"],
+}
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT_DIR,
+        env={**os.environ, "PYTHONPATH": str(ROOT_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def loaded_modules(module: str) -> set[str]:
+    """
+    Импортирует модуль в отдельном процессе и возвращает `sys.modules` после импорта.
+    """
+    result = run_python(
+        "-c", f"import json, sys, {module}; print(json.dumps(list(sys.modules)))"
+    )
+    return set(json.loads(result.stdout))
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """
+    Импортирует модуль в отдельном процессе и возвращает
+    {имя модуля: суммарное время импорта в микросекундах}.
+    """
+    result = run_python("-X", "importtime", "-c", f"import {module}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+@pytest.fixture(scope="module")
+def profiles() -> dict[str, list[dict[str, int]]]:
+    return {
+        module: [import_profile(module) for _ in range(RUNS)]
+        for module in IMPORT_BUDGETS_MS
+    }
+
+
+@pytest.mark.skipif(not CHECK_BUDGETS, reason="set IMPORT_BUDGETS=1 to check")
+@pytest.mark.parametrize("module", list(IMPORT_BUDGETS_MS))
+def test_import_time_within_budget(module, profiles):
+    best_ms = min(profile[module] for profile in profiles[module]) / 1000
+    budget_ms = IMPORT_BUDGETS_MS[module] * BUDGET_SCALE
+    if best_ms > budget_ms:
+        slowest = sorted(
+            profiles[module][0].items(), key=lambda item: item[1], reverse=True
+        )[1:11]
+        pytest.fail(
+            f"import {module} took {best_ms:.0f}ms (budget {budget_ms:.0f}ms); "
+            "slowest imports:\n"
+            + "\n".join(f"  {us / 1000:8.1f}ms  {name}" for name, us in slowest)
+        )
+
+
+@pytest.mark.parametrize("module", list(LAZY_DEPENDENCIES))
+def test_heavy_dependencies_are_lazy(module):
+    imported = loaded_modules(module)
+    eager = [name for name in LAZY_DEPENDENCIES[module] if name in imported]
+    assert not eager, f"import {module} eagerly loads {eager}"
@@ -0,0 +1,45 @@
+"""
+Раздача событий подписчикам `ChangeBroadcaster`.
+"""
+
+import asyncio
+
+from src.utils.notifications import (
+    RESYNC_ENTITY,
+    SUBSCRIBER_QUEUE_SIZE,
+    ChangeBroadcaster,
+)
+
+
+def drain(queue: asyncio.Queue) -> list[dict]:
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_overflowing_subscriber_gets_resync_instead_of_lost_events():
+    async def scenario():
+        broadcaster = ChangeBroadcaster()
+        async with broadcaster.subscribe() as queue:
+            for entity_id in range(SUBSCRIBER_QUEUE_SIZE + 1):
+                broadcaster.publish({"entity": "building", "id": entity_id})
+            return drain(queue)
+
+    events = asyncio.run(scenario())
+    assert events == [
+        {"entity": RESYNC_ENTITY},
+        {"entity": "building", "id": SUBSCRIBER_QUEUE_SIZE},
+    ]
+
+
+def test_subscriber_within_capacity_gets_every_event():
+    async def scenario():
+        broadcaster = ChangeBroadcaster()
+        async with broadcaster.subscribe() as queue:
+            for entity_id in range(3):
+                broadcaster.publish({"entity": "activity", "id": entity_id})
+            return drain(queue)
+
+    events = asyncio.run(scenario())
+    assert [event["id"] for event in events] == [0, 1, 2]
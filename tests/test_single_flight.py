@@ -0,0 +1,151 @@
+"""
+Объединение одновременных запросов (`SingleFlight`) и кэш ответов `coalesce`.
+"""
+
+import asyncio
+
+import pytest
+from pydantic import TypeAdapter
+from starlette.requests import Request
+
+from src.utils.response_cache import response_cache
+from src.utils.single_flight import SingleFlight, coalesce, request_key
+
+list_adapter = TypeAdapter(list[str])
+
+
+def make_request(path: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+        }
+    )
+
+
+def test_followers_share_leader_result_and_key_is_released():
+    async def scenario():
+        flight = SingleFlight(wait_timeout=5)
+        release = asyncio.Event()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return calls
+
+        tasks = [asyncio.create_task(flight.do("key", load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [1] * 5
+    assert flight.stats()["in_flight"] == 0
+    assert (flight.leaders, flight.followers) == (1, 4)
+
+
+def test_leader_error_propagates_to_followers():
+    async def scenario():
+        flight = SingleFlight(wait_timeout=5)
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            raise ValueError("boom")
+
+        tasks = [asyncio.create_task(flight.do("key", load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_leader_lets_followers_run_themselves():
+    async def scenario():
+        flight = SingleFlight(wait_timeout=5)
+        started = asyncio.Event()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                started.set()
+                await asyncio.sleep(3600)
+            return "follower"
+
+        leader = asyncio.create_task(flight.do("key", load))
+        await started.wait()
+        follower = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return flight, await follower
+
+    flight, result = asyncio.run(scenario())
+    assert result == "follower"
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_follower_runs_itself_after_wait_timeout():
+    async def scenario():
+        flight = SingleFlight(wait_timeout=0.01)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "leader"
+
+        async def fast():
+            return "follower"
+
+        leader = asyncio.create_task(flight.do("key", slow))
+        await asyncio.sleep(0)
+        result = await flight.do("key", fast)
+        release.set()
+        await leader
+        return flight, result
+
+    flight, result = asyncio.run(scenario())
+    assert result == "follower"
+    assert flight.timeouts == 1
+
+
+def test_coalesce_does_not_cache_load_started_before_invalidation():
+    async def scenario():
+        request = make_request("/single-flight/invalidation")
+        release = asyncio.Event()
+        data = ["old"]
+
+        async def load():
+            rows = list(data)
+            await release.wait()
+            return rows
+
+        leader = asyncio.create_task(coalesce(request, list_adapter, load))
+        await asyncio.sleep(0)
+        # Запись: данные изменились, кэш сброшен, пока загрузка ещё идёт.
+        data[:] = ["new"]
+        response_cache.invalidate()
+        follower = asyncio.create_task(coalesce(request, list_adapter, load))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(leader, follower)
+
+        assert response_cache.get(request_key(request)) is None
+        fresh = await coalesce(request, list_adapter, load)
+        assert fresh.body == b'["new"]'
+
+    asyncio.run(scenario())